@@ -6,6 +6,7 @@
 import os
 import re
 import shutil
+import sys
 import threading
 import time
 from datetime import datetime, timedelta
@@ -13,7 +14,8 @@ from datetime import datetime, timedelta
 import inflection
 from cached_property import cached_property
 
-from module.base.decorator import del_cached_property
+from module.base.decorator import del_cached_property, has_cached_property
+from module.base.profiler import profiler
 from module.base.api_client import ApiClient
 from module.config.config import AzurLaneConfig, TaskEnd
 from module.config.deep import deep_get, deep_set
@@ -143,6 +145,8 @@ class AzurLaneAutoScript:
             False: 任务失败且不可恢复（计入失败限制）
             'recoverable': 任务失败但可恢复（不计入失败限制）
         """
+        sampling = self.config.Optimization_ProfileSampling
+        profiler.start(command, sampling=sampling)
         try:
             if not skip_first_screenshot:
                 self.device.screenshot()
@@ -269,6 +273,28 @@ class AzurLaneAutoScript:
             )
             # exit(1)
             raise
+        finally:
+            # Write config modifications delayed by CONFIG_WRITE_DEBOUNCE
+            if has_cached_property(self, 'config'):
+                self.config.flush()
+            # Write CL1 statistics buffered by Cl1Database, if it's used in this process
+            cl1_database = sys.modules.get('module.statistics.cl1_database')
+            if cl1_database is not None:
+                cl1_database.db.flush()
+            self.profile_save()
+
+    def profile_save(self):
+        """
+        Save time costs of the task just run to ./log/profile/<config-name>.json,
+        and show the most time costing points in log, so they are visible in GUI.
+        Sampled call stacks are shown as well if `Optimization_ProfileSampling` is enabled.
+        """
+        summary = profiler.end()
+        try:
+            profiler.dump(summary, f'./log/profile/{self.config_name}.json')
+        except OSError as e:
+            logger.warning(f'Failed to save profile: {e}')
+        profiler.show(summary)
 
     def keep_last_errlog(self, folder_path, n: int = 30):
         """
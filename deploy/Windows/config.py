@@ -39,6 +39,7 @@ class ConfigModel:
     StartOcrServer: bool = False
     OcrServerPort: int = 22268
     OcrClientAddress: str = "127.0.0.1:22268"
+    OcrServerSessions: int = 2
 
     # Update
     EnableReload: bool = True
@@ -47,6 +48,7 @@ class ConfigModel:
 
     # Misc
     DiscordRichPresence: bool = False
+    SharedAssetAtlas: bool = False
 
     # Remote Access
     EnableRemoteAccess: bool = False
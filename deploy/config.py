@@ -36,6 +36,7 @@ class ConfigModel:
     StartOcrServer: bool = False
     OcrServerPort: int = 22268
     OcrClientAddress: str = "127.0.0.1:22268"
+    OcrServerSessions: int = 2
 
     # Update
     EnableReload: bool = True
@@ -44,6 +45,7 @@ class ConfigModel:
 
     # Misc
     DiscordRichPresence: bool = False
+    SharedAssetAtlas: bool = False
 
     # Remote Access
     EnableRemoteAccess: bool = True
@@ -0,0 +1,26 @@
+import argparse
+
+import module.config.server as server
+
+server.server = 'cn'  # Don't need to edit, it's used to avoid error.
+
+from module.base.atlas import ATLAS_FOLDER, build_atlas
+from module.config.server import VALID_SERVER
+
+"""
+Pack cropped images of all buttons and templates into ./assets/atlas/{server}.npy
+Button and Template will load images from the atlas as memory-mapped views instead of decoding PNG files.
+Images whose asset file is modified after packing are ignored, run this again after `button_extract.py`.
+
+Usage:
+    python -m dev_tools.asset_atlas
+    python -m dev_tools.asset_atlas --server cn en
+"""
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build asset atlas')
+    parser.add_argument('--server', nargs='+', default=VALID_SERVER, choices=VALID_SERVER)
+    parser.add_argument('--folder', default=ATLAS_FOLDER)
+    args = parser.parse_args()
+
+    build_atlas(servers=args.server, folder=args.folder)
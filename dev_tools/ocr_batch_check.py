@@ -0,0 +1,85 @@
+import module.config.server as server
+
+server.server = 'cn'  # Don't need to edit, it's used to avoid error.
+
+import argparse
+import glob
+import os
+
+import numpy as np
+
+from module.base.utils import load_image
+from module.logger import logger
+from module.ocr.al_ocr import AlOcr
+
+"""
+Consistency check of batched recognition in module.ocr.al_ocr.AlOcr.
+Recognize the same line crops one by one and in a batch, results should be identical,
+including low confidence ones.
+
+Usage:
+    python -m dev_tools.ocr_batch_check --folder ./screenshots/ocr --lang en
+    python -m dev_tools.ocr_batch_check --random 32 --lang zhcn
+"""
+
+
+def load_crops(folder, random):
+    """
+    Args:
+        folder (str): Folder of line crops in png, or None.
+        random (int): Number of random noise crops, which are recognized with low scores.
+
+    Returns:
+        list[tuple[str, np.ndarray]]: Name and image.
+    """
+    crops = []
+    if folder:
+        for file in sorted(glob.glob(os.path.join(folder, '*.png'))):
+            crops.append((os.path.basename(file), load_image(file)))
+    rng = np.random.default_rng(0)
+    for index in range(random):
+        width = int(rng.integers(32, 320))
+        crops.append((f'random_{index}', rng.integers(0, 255, (32, width, 3), dtype=np.uint8)))
+    return crops
+
+
+def check(crops, lang='en'):
+    """
+    Args:
+        crops (list[tuple[str, np.ndarray]]):
+        lang (str): Model name of AlOcr.
+
+    Returns:
+        int: Number of crops that read differently.
+    """
+    if len(crops) < 2:
+        logger.warning('At least 2 crops are required to test batching')
+        return 0
+    ocr = AlOcr(name=lang)
+    ocr.init()
+    images = [image for _, image in crops]
+
+    single = [ocr.ocr_for_single_lines([image])[0] for image in images]
+    batch = ocr._rec_batch(images)
+    if batch is None:
+        logger.warning('Batched recognition is unavailable, nothing to check')
+        return 0
+
+    failed = 0
+    for (name, _), res_1, res_2 in zip(crops, single, batch):
+        if res_1 != res_2:
+            logger.warning(f'{name}: one by one "{res_1}", batched "{res_2}"')
+            failed += 1
+
+    logger.hr('Result', level=1)
+    logger.info(f'Crops: {len(crops)}, different: {failed}')
+    return failed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Check batched OCR against one by one OCR')
+    parser.add_argument('--folder', default=None, help='Folder of line crops')
+    parser.add_argument('--random', type=int, default=16, help='Number of random noise crops')
+    parser.add_argument('--lang', default='en', help='en or zhcn')
+    args = parser.parse_args()
+    exit(1 if check(load_crops(args.folder, args.random), lang=args.lang) else 0)
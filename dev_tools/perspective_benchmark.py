@@ -0,0 +1,98 @@
+import module.config.server as server
+
+server.server = 'cn'  # Don't need to edit, it's used to avoid error.
+
+import argparse
+import glob
+import os
+import time
+
+import numpy as np
+
+from module.base.utils import load_image
+from module.config.config import AzurLaneConfig
+from module.exception import MapDetectionError
+from module.logger import logger
+from module.map_detection.perspective import Perspective
+
+"""
+Regression benchmark of module.map_detection.perspective_solver.
+Load saved map screenshots, solve perspective with scipy.optimize.brute and with PerspectiveSolver,
+compare the vanish points and distant points, and print time cost.
+
+Usage:
+    python -m dev_tools.perspective_benchmark --folder ./screenshots/map
+"""
+
+
+def solve(perspective, image):
+    """
+    Returns:
+        tuple: vanish_point, distant_point, time cost. Points are None if detection failed.
+    """
+    start = time.perf_counter()
+    try:
+        perspective.load(image)
+    except MapDetectionError as e:
+        logger.warning(e)
+        return None, None, time.perf_counter() - start
+    return np.array(perspective.vanish_point), np.array(perspective.distant_point), time.perf_counter() - start
+
+
+def benchmark(folder, tolerance=1.0):
+    """
+    Args:
+        folder (str): Folder of map screenshots in png.
+        tolerance (float): Max distance in pixels between two methods.
+
+    Returns:
+        int: Number of images that exceed tolerance.
+    """
+    files = sorted(glob.glob(os.path.join(folder, '*.png')))
+    if not files:
+        logger.warning(f'No png images in {folder}')
+        return 0
+
+    config_brute = AzurLaneConfig('template')
+    config_brute.PERSPECTIVE_SOLVER = False
+    config_solver = AzurLaneConfig('template')
+    config_solver.PERSPECTIVE_SOLVER = True
+    brute = Perspective(config_brute)
+    # Share solver between images, so warm start is tested on continuous screenshots
+    solver = Perspective(config_solver)
+
+    failed = 0
+    cost_brute, cost_solver = [], []
+    for file in files:
+        image = load_image(file)
+        vanish_1, distant_1, time_1 = solve(brute, image)
+        vanish_2, distant_2, time_2 = solve(solver, image)
+        cost_brute.append(time_1)
+        cost_solver.append(time_2)
+        if vanish_1 is None or vanish_2 is None:
+            if (vanish_1 is None) != (vanish_2 is None):
+                logger.warning(f'{file}: detection result differs')
+                failed += 1
+            continue
+
+        diff_vanish = np.linalg.norm(vanish_1 - vanish_2)
+        diff_distant = np.linalg.norm(distant_1 - distant_2)
+        logger.info(f'{os.path.basename(file)}: vanish diff {diff_vanish:.2f}, distant diff {diff_distant:.2f}, '
+                    f'brute {time_1:.3f}s, solver {time_2:.3f}s')
+        if diff_vanish > tolerance or diff_distant > tolerance:
+            logger.warning(f'{file}: exceeds tolerance')
+            failed += 1
+
+    logger.hr('Result', level=1)
+    logger.info(f'Images: {len(files)}, failed: {failed}')
+    logger.info(f'brute: {np.mean(cost_brute):.3f}s per image')
+    logger.info(f'solver: {np.mean(cost_solver):.3f}s per image')
+    return failed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Perspective solver regression benchmark')
+    parser.add_argument('--folder', required=True, help='Folder of map screenshots')
+    parser.add_argument('--tolerance', type=float, default=1.0, help='Max distance in pixels between two methods')
+    args = parser.parse_args()
+    exit(1 if benchmark(args.folder, tolerance=args.tolerance) else 0)
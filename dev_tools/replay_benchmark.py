@@ -0,0 +1,83 @@
+import module.config.server as server
+
+server.server = 'cn'  # Don't need to edit, it's used to avoid error.
+
+import argparse
+import importlib
+import time
+
+from module.base.profiler import profiler
+from module.device.replay_device import ReplayDevice
+from module.exception import ReplayEnd
+from module.logger import logger
+
+"""
+Offline benchmark of a whole task on recorded screenshots.
+Screenshots and controls are served by module.device.replay_device.ReplayDevice,
+record them with `DEVICE_REPLAY_RECORD` in config_manual, or use an error log folder.
+
+Usage:
+    python -m dev_tools.replay_benchmark --config alas --folder ./log/replay/alas \
+        --function module.ui.ui:UI.ui_goto_main
+"""
+
+
+def load_function(path):
+    """
+    Args:
+        path (str): Such as 'module.ui.ui:UI.ui_goto_main'
+
+    Returns:
+        type, str: Class and method name.
+    """
+    module, _, attr = path.partition(':')
+    cls, _, method = attr.partition('.')
+    return getattr(importlib.import_module(module), cls), method
+
+
+def benchmark(config, folder, function):
+    """
+    Args:
+        config (str): Config name.
+        folder (str): Replay folder.
+        function (str): See `load_function()`.
+
+    Returns:
+        bool: If function finished before the recording ended.
+    """
+    cls, method = load_function(function)
+    device = ReplayDevice(config, folder=folder)
+    module = cls(device.config, device=device)
+
+    start_time = time.perf_counter()
+    start_cpu = time.process_time()
+    profiler.start(function)
+    finished = True
+    try:
+        getattr(module, method)()
+    except ReplayEnd as e:
+        logger.warning(e)
+        finished = False
+    cost_time = time.perf_counter() - start_time
+    cost_cpu = time.process_time() - start_cpu
+    profiler.show(profiler.end())
+
+    logger.hr('Result', level=1)
+    logger.attr('Function', function)
+    logger.attr('Finished', finished)
+    logger.attr('Frames', device.frame_id)
+    logger.attr('Controls', f'{device.replay.segment}/{len(device.replay.controls)}')
+    logger.attr('Time', f'{cost_time:.3f}s')
+    logger.attr('CPU', f'{cost_cpu:.3f}s')
+    if device.frame_id:
+        logger.attr('CPU per frame', f'{cost_cpu / device.frame_id * 1000:.1f}ms')
+    return finished
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Offline task benchmark on recorded screenshots')
+    parser.add_argument('--config', default='alas', help='Config name')
+    parser.add_argument('--folder', required=True, help='Replay folder or error log folder')
+    parser.add_argument('--function', required=True, help='Such as module.ui.ui:UI.ui_goto_main')
+    args = parser.parse_args()
+    exit(0 if benchmark(args.config, args.folder, args.function) else 1)
@@ -0,0 +1,344 @@
+import glob
+import importlib
+import json
+import os
+import time
+
+import cv2
+import numpy as np
+
+import module.config.server as server
+from module.base.utils import image_channel, load_image, rgb2luma
+from module.logger import logger
+
+ATLAS_FOLDER = './assets/atlas'
+ATLAS_VERSION = 1
+
+
+# Derived images packed along with the original one
+# 'binary': gray scale image after OTSU binarization, used in `match_binary()`
+# 'luma': Y channel in YUV color space, used in `match_luma()`
+ATLAS_KINDS = ['', 'binary', 'luma']
+
+
+def _atlas_key(file, area=None, kind=''):
+    """
+    Args:
+        file (str): Filepath of asset, such as './assets/cn/ui/BACK_ARROW.png'
+        area (tuple[int]): Area to crop, or None for the whole image.
+        kind (str): '' for the original image, or a derived kind in ATLAS_KINDS
+
+    Returns:
+        str: './assets/cn/ui/BACK_ARROW.png:33,44,47,64' or './assets/cn/ui/BACK_ARROW.png:33,44,47,64#luma'
+    """
+    key = file.replace('\\', '/')
+    if area is not None:
+        key = f'{key}:{",".join(str(int(x)) for x in area)}'
+    if kind:
+        key = f'{key}#{kind}'
+    return key
+
+
+def _derive(image, kind):
+    """
+    Args:
+        image (np.ndarray): Original image
+        kind (str):
+
+    Returns:
+        np.ndarray: Derived image, or None if not available
+    """
+    if not kind:
+        return image
+    if image_channel(image) != 3:
+        return None
+    if kind == 'binary':
+        image_gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        _, image_binary = cv2.threshold(image_gray, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+        return image_binary
+    if kind == 'luma':
+        return rgb2luma(image)
+    return None
+
+
+def _file_stat(file):
+    """
+    Returns:
+        list[int]: [st_mtime_ns, st_size], or None if file not exists
+    """
+    try:
+        stat = os.stat(file)
+    except FileNotFoundError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+class AssetAtlas:
+    """
+    All cropped button images and template images of one server,
+    packed into one uncompressed npy file with a json index.
+
+    The npy file is loaded as memory-mapped, images are zero-copy views of it,
+    so there's no PNG decoding at startup and pages are shared across Alas processes.
+    Images from atlas are read-only.
+    """
+    # Seconds to wait before trying to load a missing atlas again,
+    # GUI may be packing it when Alas instances start
+    RETRY_INTERVAL = 60
+
+    def __init__(self, server_name, folder=ATLAS_FOLDER):
+        self.server = server_name
+        self.folder = folder
+        self.file_index = os.path.join(folder, f'{server_name}.json')
+        self.data = None
+        self.index = {}
+        self.loaded = False
+        self.retry_at = 0.
+
+    def load(self):
+        """
+        Returns:
+            bool: If atlas available
+        """
+        if self.loaded:
+            if self.data is not None:
+                return True
+            if time.time() < self.retry_at:
+                return False
+        self.loaded = True
+        self.retry_at = time.time() + self.RETRY_INTERVAL
+        if not os.path.exists(self.file_index):
+            return False
+        try:
+            with open(self.file_index, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            if index.get('version') != ATLAS_VERSION:
+                logger.info(f'Asset atlas {self.file_index} is outdated, ignored')
+                return False
+            self.index = index['entries']
+            self.data = np.load(os.path.join(self.folder, index['data']), mmap_mode='r')
+        except Exception as e:
+            logger.warning(f'Failed to load asset atlas {self.file_index}: {e}')
+            self.index = {}
+            self.data = None
+            return False
+        return True
+
+    def get(self, file, area=None, kind=''):
+        """
+        Args:
+            file (str): Filepath of asset.
+            area (tuple[int]): Area to crop, or None for the whole image.
+            kind (str): '' for the original image, or a derived kind in ATLAS_KINDS
+
+        Returns:
+            np.ndarray: Read-only image, or None if not in atlas or asset file is modified after packing.
+        """
+        if not self.load():
+            return None
+        try:
+            offset, shape, stat = self.index[_atlas_key(file, area, kind)]
+        except KeyError:
+            return None
+        if _file_stat(file) != stat:
+            return None
+        size = int(np.prod(shape))
+        return np.asarray(self.data[offset:offset + size]).reshape(shape)
+
+    def release(self):
+        self.data = None
+        self.index = {}
+        self.loaded = False
+        self.retry_at = 0.
+
+
+class AtlasLoader:
+    def __init__(self, folder=ATLAS_FOLDER):
+        self.folder = folder
+        self.atlas = {}
+
+    def get(self, file, area=None, kind=''):
+        """
+        Get image from the atlas of current server.
+
+        Args:
+            file (str): Filepath of asset.
+            area (tuple[int]): Area to crop, or None for the whole image.
+            kind (str): '' for the original image, or a derived kind in ATLAS_KINDS
+
+        Returns:
+            np.ndarray: Read-only image, or None if not available.
+        """
+        try:
+            atlas = self.atlas[server.server]
+        except KeyError:
+            atlas = AssetAtlas(server.server, folder=self.folder)
+            self.atlas[server.server] = atlas
+        return atlas.get(file, area, kind)
+
+    def release(self):
+        for atlas in self.atlas.values():
+            atlas.release()
+        self.atlas = {}
+
+
+ATLAS = AtlasLoader()
+
+
+def import_all_assets():
+    """
+    Import all `module/*/assets.py`, so all buttons and templates are registered in `Resource.instances`.
+    """
+    for file in sorted(glob.glob('./module/**/assets.py', recursive=True)):
+        module = os.path.splitext(os.path.normpath(file))[0].replace(os.sep, '.')
+        try:
+            importlib.import_module(module)
+        except Exception as e:
+            logger.warning(f'Failed to import {module}: {e}')
+
+
+def iter_assets(server_name):
+    """
+    Args:
+        server_name (str):
+
+    Yields:
+        str, tuple[int], list[str]: Filepath, area to crop and kinds to pack.
+            Area is None for templates.
+    """
+    from module.base.button import Button
+    from module.base.resource import Resource
+    from module.base.template import Template
+    for obj in list(Resource.instances.values()):
+        if isinstance(obj, Button):
+            file = obj.parse_property(obj.raw_file, server_name)
+            area = obj.parse_property(obj.raw_area, server_name)
+            if not file or not area:
+                continue
+            yield file, tuple(area), ATLAS_KINDS
+        elif type(obj) is Template:
+            # Subclasses of Template may have their own pre_process() and image loading
+            file = obj.parse_property(obj.raw_file, server_name)
+            if not file:
+                continue
+            yield file, None, ATLAS_KINDS
+
+
+def _read_index(file_index):
+    """
+    Returns:
+        dict: Index of atlas, or None if not available
+    """
+    try:
+        with open(file_index, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    if index.get('version') != ATLAS_VERSION:
+        return None
+    if not os.path.exists(os.path.join(os.path.dirname(file_index), index.get('data', ''))):
+        return None
+    return index
+
+
+def atlas_outdated(server_name, folder=ATLAS_FOLDER):
+    """
+    Args:
+        server_name (str):
+        folder (str):
+
+    Returns:
+        bool: If atlas is missing or any asset is modified after packing.
+            `import_all_assets()` should be called before.
+    """
+    index = _read_index(os.path.join(folder, f'{server_name}.json'))
+    if index is None:
+        return True
+    entries = index['entries']
+    for file, area, kinds in iter_assets(server_name):
+        if os.path.splitext(file)[1] == '.gif':
+            continue
+        stat = _file_stat(file)
+        if stat is None:
+            continue
+        try:
+            _, _, packed = entries[_atlas_key(file, area)]
+        except KeyError:
+            return True
+        if packed != stat:
+            return True
+    return False
+
+
+def build_atlas(servers=None, folder=ATLAS_FOLDER, only_outdated=False):
+    """
+    Pack cropped images of all buttons and templates into `{folder}/{server}.npy`,
+    along with their derived images in ATLAS_KINDS.
+    Gif assets are not packed.
+
+    Args:
+        servers (list[str]): Default to all servers.
+        folder (str):
+        only_outdated (bool): True to skip servers whose atlas is up to date.
+
+    Returns:
+        dict[str, int]: Key: server, value: number of images packed.
+    """
+    from module.config.server import VALID_SERVER
+    if servers is None:
+        servers = VALID_SERVER
+    import_all_assets()
+    os.makedirs(folder, exist_ok=True)
+
+    result = {}
+    for server_name in servers:
+        if only_outdated and not atlas_outdated(server_name, folder=folder):
+            logger.info(f'Asset atlas {server_name} is up to date')
+            continue
+        logger.hr(f'Build asset atlas {server_name}', level=2)
+        index = {}
+        chunks = []
+        offset = 0
+        for file, area, kinds in iter_assets(server_name):
+            if _atlas_key(file, area) in index or os.path.splitext(file)[1] == '.gif':
+                continue
+            stat = _file_stat(file)
+            if stat is None:
+                continue
+            try:
+                origin = load_image(file, area)
+            except Exception as e:
+                logger.warning(f'Failed to load {_atlas_key(file, area)}: {e}')
+                continue
+            for kind in kinds:
+                image = _derive(origin, kind)
+                if image is None:
+                    continue
+                image = np.ascontiguousarray(image, dtype=np.uint8)
+                index[_atlas_key(file, area, kind)] = [offset, list(image.shape), stat]
+                chunks.append(image.ravel())
+                offset += image.size
+
+        data = np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.uint8)
+        # Running instances may have the old atlas mapped, which can't be overwritten on Windows.
+        # Write data into a new file and switch index to it, index is replaced atomically.
+        name = f'{server_name}.{int(time.time() * 1000)}.npy'
+        file_index = os.path.join(folder, f'{server_name}.json')
+        np.save(os.path.join(folder, name), data)
+        with open(f'{file_index}.tmp', 'w', encoding='utf-8') as f:
+            json.dump({'version': ATLAS_VERSION, 'data': name, 'entries': index}, f)
+        os.replace(f'{file_index}.tmp', file_index)
+        logger.info(f'Packed {len(index)} images, {data.size / 1024 / 1024:.1f} MB')
+        result[server_name] = len(index)
+
+        # Remove old data files, skip those still in use
+        for file in glob.glob(os.path.join(folder, f'{server_name}.*.npy')):
+            if os.path.basename(file) == name:
+                continue
+            try:
+                os.remove(file)
+            except OSError:
+                pass
+
+    ATLAS.release()
+    return result
@@ -1,5 +1,8 @@
+import time
+
 from module.base.button import Button
 from module.base.decorator import cached_property
+from module.base.profiler import profiler
 # 此文件定义了 Alas 逻辑模块的最高基类 ModuleBase。
 # 作为所有具体功能模块（如出击、大世界、每日任务等）的公共祖先，它整合了 UI 导航、任务循环控制及基本异常处理逻辑。
 from module.base.timer import Timer
@@ -223,14 +226,22 @@ class ModuleBase:
             if not self.interval_timer[button.name].reached():
                 return False
 
+        start = time.perf_counter()
         if isinstance(button, HierarchyButton):
             appear = bool(button)
         elif offset:
             if isinstance(offset, bool):
                 offset = self.config.BUTTON_OFFSET
-            appear = button.match(self.device.image, offset=offset, similarity=similarity)
+            if self.config.BUTTON_FRAME_CACHE and isinstance(button, Button):
+                appear = self.device.frame_detection.match(button, offset=offset, similarity=similarity)
+            else:
+                appear = button.match(self.device.image, offset=offset, similarity=similarity)
         else:
-            appear = button.appear_on(self.device.image, threshold=threshold)
+            if self.config.BUTTON_FRAME_CACHE and isinstance(button, Button):
+                appear = self.device.frame_detection.appear_on(button, threshold=threshold)
+            else:
+                appear = button.appear_on(self.device.image, threshold=threshold)
+        profiler.add('appear', button.name, time.perf_counter() - start)
 
         if appear and interval:
             self.interval_timer[button.name].reset()
@@ -261,8 +272,10 @@ class ModuleBase:
             if not self.interval_timer[button.name].reached():
                 return False
 
+        start = time.perf_counter()
         appear = button.match_template_color(
             self.device.image, offset=offset, similarity=similarity, threshold=threshold)
+        profiler.add('appear', button.name, time.perf_counter() - start)
 
         if appear and interval:
             self.interval_timer[button.name].reset()
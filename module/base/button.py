@@ -7,6 +7,7 @@ import traceback
 import imageio
 from PIL import ImageDraw
 
+from module.base.atlas import ATLAS
 from module.base.decorator import cached_property
 from module.base.resource import Resource
 from module.base.utils import *
@@ -45,6 +46,8 @@ class Button(Resource):
         self.image = None
         self.image_binary = None
         self.image_luma = None
+        # If self.image is loaded from asset atlas, derived images can be loaded from atlas too
+        self._atlas_loaded = False
 
         if self.file:
             self.resource_add(key=self.file)
@@ -133,6 +136,7 @@ class Button(Resource):
         self.__dict__['color'] = get_color(image, self.area)
         self.image = crop(image, self.area)
         self.__dict__['is_gif'] = False
+        self._atlas_loaded = False
         return self.color
 
     def load_offset(self, button):
@@ -161,7 +165,11 @@ class Button(Resource):
                     image = crop(image, self.area)
                     self.image.append(image)
             else:
-                self.image = load_image(self.file, self.area)
+                image = ATLAS.get(self.file, self.area)
+                self._atlas_loaded = image is not None
+                if image is None:
+                    image = load_image(self.file, self.area)
+                self.image = image
             self._match_init = True
 
     def ensure_binary_template(self):
@@ -177,8 +185,11 @@ class Button(Resource):
                     _, image_binary = cv2.threshold(image_gray, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
                     self.image_binary.append(image_binary)
             else:
-                image_gray = cv2.cvtColor(self.image, cv2.COLOR_BGR2GRAY)
-                _, self.image_binary = cv2.threshold(image_gray, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+                image = ATLAS.get(self.file, self.area, 'binary') if self._atlas_loaded else None
+                if image is None:
+                    image_gray = cv2.cvtColor(self.image, cv2.COLOR_BGR2GRAY)
+                    _, image = cv2.threshold(image_gray, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+                self.image_binary = image
             self._match_binary_init = True
 
     def ensure_luma_template(self):
@@ -189,7 +200,10 @@ class Button(Resource):
                     luma = rgb2luma(image)
                     self.image_luma.append(luma)
             else:
-                self.image_luma = rgb2luma(self.image)
+                image = ATLAS.get(self.file, self.area, 'luma') if self._atlas_loaded else None
+                if image is None:
+                    image = rgb2luma(self.image)
+                self.image_luma = image
             self._match_luma_init = True
 
     def resource_release(self):
@@ -197,6 +211,7 @@ class Button(Resource):
         self.image = None
         self.image_binary = None
         self.image_luma = None
+        self._atlas_loaded = False
         self._match_init = False
         self._match_binary_init = False
         self._match_luma_init = False
@@ -232,11 +247,39 @@ class Button(Resource):
                     return True
             return False
         else:
-            res = cv2.matchTemplate(self.image, image, cv2.TM_CCOEFF_NORMED)
-            _, sim, _, point = cv2.minMaxLoc(res)
-            self._button_offset = area_offset(self._button, offset[:2] + np.array(point))
+            sim, self._button_offset = self.match_similarity(image, offset=offset, cropped=True)
             return sim > similarity
 
+    def match_similarity(self, image, offset=30, cropped=False):
+        """
+        Template matching without a similarity threshold, gif buttons are not supported.
+
+        Args:
+            image: Screenshot.
+            offset (int, tuple, np.ndarray): Detection area offset.
+            cropped (bool): True if image is already cropped by offset, offset must be a np.ndarray.
+
+        Returns:
+            float: Similarity, 0-1.
+            tuple[int]: Button offset.
+        """
+        self.ensure_template()
+
+        if not cropped:
+            if isinstance(offset, tuple):
+                if len(offset) == 2:
+                    offset = np.array((-offset[0], -offset[1], offset[0], offset[1]))
+                else:
+                    offset = np.array(offset)
+            else:
+                offset = np.array((-3, -offset, 3, offset))
+            image = crop(image, offset + self.area, copy=False)
+
+        res = cv2.matchTemplate(self.image, image, cv2.TM_CCOEFF_NORMED)
+        _, sim, _, point = cv2.minMaxLoc(res)
+        button_offset = area_offset(self._button, offset[:2] + np.array(point))
+        return sim, button_offset
+
     def match_binary(self, image, offset=30, similarity=0.85):
         """Detects button by template matching. To Some button, its location may not be static.
            This method will apply template matching under binarization.
@@ -0,0 +1,288 @@
+import json
+import os
+import sys
+import threading
+import time
+from bisect import bisect_right
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import wraps
+
+from rich.table import Table
+
+from module.logger import logger
+
+# Upper bounds of histogram buckets in seconds, the last bucket is unbounded
+BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5)
+
+
+class Stat:
+    """
+    Counter and time histogram of a measured point.
+    """
+    __slots__ = ('count', 'total', 'max', 'histogram')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.
+        self.max = 0.
+        self.histogram = [0] * (len(BUCKETS) + 1)
+
+    def add(self, cost):
+        self.count += 1
+        self.total += cost
+        if cost > self.max:
+            self.max = cost
+        self.histogram[bisect_right(BUCKETS, cost)] += 1
+
+    def to_dict(self):
+        labels = [f'<{b * 1000:g}ms' for b in BUCKETS] + [f'>={BUCKETS[-1] * 1000:g}ms']
+        return {
+            'count': self.count,
+            'total': round(self.total, 6),
+            'mean': round(self.total / self.count, 6) if self.count else 0.,
+            'max': round(self.max, 6),
+            'histogram': {label: n for label, n in zip(labels, self.histogram) if n},
+        }
+
+
+class StackSampler:
+    """
+    Sample call stacks of a thread periodically, to find the handler chains that cost CPU.
+
+    Only reads `sys._current_frames()` from a background thread,
+    the sampled thread is not slowed down except by the GIL it waits for.
+    """
+
+    def __init__(self, thread_id, interval=0.01, depth=16):
+        """
+        Args:
+            thread_id (int): Thread to sample, usually `threading.get_ident()` of the main thread.
+            interval (float): Seconds between two samples.
+            depth (int): Max frames kept in each stack, from the innermost.
+        """
+        self.thread_id = thread_id
+        self.interval = interval
+        self.depth = depth
+        # Key: tuple of frame names, outermost first. Value: int, number of samples
+        self.stacks = defaultdict(int)
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True, name='StackSampler')
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=1)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                break
+            stack = []
+            while frame is not None and len(stack) < self.depth:
+                code = frame.f_code
+                stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})')
+                frame = frame.f_back
+            self.stacks[tuple(reversed(stack))] += 1
+            self.samples += 1
+
+    def summary(self, top=20):
+        """
+        Returns:
+            dict: Number of samples, functions with the most samples on top of stack,
+                and the most sampled stacks.
+        """
+        functions = defaultdict(int)
+        for stack, n in self.stacks.items():
+            functions[stack[-1]] += n
+        functions = sorted(functions.items(), key=lambda kv: kv[1], reverse=True)[:top]
+        stacks = sorted(self.stacks.items(), key=lambda kv: kv[1], reverse=True)[:top]
+        return {
+            'samples': self.samples,
+            'interval': self.interval,
+            'functions': [{'function': f, 'samples': n} for f, n in functions],
+            'stacks': [{'stack': list(s), 'samples': n} for s, n in stacks],
+        }
+
+
+class Profiler:
+    """
+    Lightweight instrumentation on hot paths, aggregated per task run.
+
+    Measured points are named in (category, name), such as ('appear', 'GOTO_MAIN'), ('ocr', 'OCR_OIL').
+    Stats are updated without locks, numbers from background threads may be slightly off.
+
+    Examples:
+        profiler.start('Commission')
+        with profiler.measure('ocr', 'OCR_OIL'):
+            ...
+        profiler.add('appear', button.name, cost)
+        summary = profiler.end()
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self.task = ''
+        self.start_time = 0.
+        self.start_cpu = 0.
+        # Key: (category, name). Value: Stat
+        self.stats = {}
+        self.sampler = None
+
+    def start(self, task, sampling=False):
+        """
+        Args:
+            task (str): Task name.
+            sampling (bool): True to sample call stacks of current thread during the task.
+        """
+        self.stop_sampler()
+        self.task = task
+        self.stats = {}
+        self.start_time = time.perf_counter()
+        self.start_cpu = time.process_time()
+        if sampling:
+            self.sampler = StackSampler(threading.get_ident())
+            self.sampler.start()
+
+    def stop_sampler(self):
+        if self.sampler is not None:
+            self.sampler.stop()
+
+    def add(self, category, name, cost):
+        """
+        Args:
+            category (str):
+            name (str):
+            cost (float): Time cost in seconds.
+        """
+        if not self.enabled:
+            return
+        key = (category, name)
+        try:
+            stat = self.stats[key]
+        except KeyError:
+            stat = self.stats[key] = Stat()
+        stat.add(cost)
+
+    @contextmanager
+    def measure(self, category, name=''):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(category, name, time.perf_counter() - start)
+
+    def summary(self):
+        """
+        Returns:
+            dict: JSON serializable.
+        """
+        stats = {}
+        for (category, name), stat in sorted(self.stats.items()):
+            stats.setdefault(category, {})[name] = stat.to_dict()
+        data = {
+            'task': self.task,
+            'time': round(time.perf_counter() - self.start_time, 3),
+            'cpu': round(time.process_time() - self.start_cpu, 3),
+            'stats': stats,
+        }
+        if self.sampler is not None:
+            data['sampling'] = self.sampler.summary()
+        return data
+
+    def end(self):
+        """
+        Returns:
+            dict: Summary of current task run.
+        """
+        self.stop_sampler()
+        summary = self.summary()
+        self.sampler = None
+        return summary
+
+    @staticmethod
+    def dump(summary, file):
+        """
+        Save summary of the latest run of each task into a JSON file.
+
+        Args:
+            summary (dict):
+            file (str):
+        """
+        data = {}
+        if os.path.exists(file):
+            try:
+                with open(file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                data = {}
+        data[summary['task']] = summary
+        os.makedirs(os.path.dirname(file) or '.', exist_ok=True)
+        with open(file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+
+    @staticmethod
+    def show(summary, top=10):
+        """
+        Print the most time costing points in summary.
+
+        Args:
+            summary (dict):
+            top (int):
+        """
+        rows = []
+        for category, stats in summary['stats'].items():
+            for name, stat in stats.items():
+                rows.append((f'{category} {name}'.strip(), stat))
+        rows = sorted(rows, key=lambda row: row[1]['total'], reverse=True)[:top]
+
+        logger.hr(f'Profile {summary["task"]}', level=2)
+        logger.info(f'Time: {summary["time"]}s, CPU: {summary["cpu"]}s')
+        table = Table(show_lines=False)
+        table.add_column('Point', header_style="bright_cyan", style="cyan", no_wrap=True)
+        table.add_column('Count', style="green")
+        table.add_column('Total', style="magenta")
+        table.add_column('Mean', style="magenta")
+        table.add_column('Max', style="magenta")
+        for name, stat in rows:
+            table.add_row(name, str(stat['count']), f'{stat["total"]:.3f}s',
+                          f'{stat["mean"] * 1000:.1f}ms', f'{stat["max"] * 1000:.1f}ms')
+        logger.print(table)
+
+        sampling = summary.get('sampling')
+        if sampling and sampling['functions']:
+            logger.info(f'Sampled {sampling["samples"]} stacks, top functions:')
+            for row in sampling['functions'][:top]:
+                logger.info(f'{row["samples"]:>6} {row["function"]}')
+
+
+profiler = Profiler()
+
+
+def profile(category, name=''):
+    """
+    Decorator to measure a function with the global profiler.
+
+    Args:
+        category (str):
+        name (str): Function name if empty.
+    """
+
+    def decorate(func):
+        key = name or func.__name__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profiler.add(category, key, time.perf_counter() - start)
+
+        return wrapper
+
+    return decorate
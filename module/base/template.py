@@ -2,6 +2,7 @@ import os
 
 import imageio
 
+from module.base.atlas import ATLAS
 from module.base.button import Button
 from module.base.decorator import cached_property
 from module.base.resource import Resource
@@ -20,6 +21,8 @@ class Template(Resource):
         self._image = None
         self._image_binary = None
         self._image_luma = None
+        # If self._image is loaded from asset atlas, derived images can be loaded from atlas too
+        self._atlas_loaded = False
 
         self.resource_add(self.file)
 
@@ -55,7 +58,12 @@ class Template(Resource):
                     image = self.pre_process(image)
                     self._image += [image, cv2.flip(image, 1)]
             else:
-                self._image = self.pre_process(load_image(self.file))
+                image = ATLAS.get(self.file)
+                # Subclasses may have their own pre_process()
+                self._atlas_loaded = image is not None and type(self) is Template
+                if image is None:
+                    image = load_image(self.file)
+                self._image = self.pre_process(image)
 
         return self._image
 
@@ -69,8 +77,13 @@ class Template(Resource):
                     _, image_binary = cv2.threshold(image_gray, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
                     self._image_binary.append(image_binary)
             else:
-                image_gray = cv2.cvtColor(self.image, cv2.COLOR_BGR2GRAY)
-                _, self._image_binary = cv2.threshold(image_gray, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+                # Load image first, to know if it's from atlas
+                _ = self.image
+                image = ATLAS.get(self.file, kind='binary') if self._atlas_loaded else None
+                if image is None:
+                    image_gray = cv2.cvtColor(self.image, cv2.COLOR_BGR2GRAY)
+                    _, image = cv2.threshold(image_gray, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+                self._image_binary = image
 
         return self._image_binary
 
@@ -83,19 +96,26 @@ class Template(Resource):
                     luma = rgb2luma(image)
                     self.image_luma.append(luma)
             else:
-                self._image_luma = rgb2luma(self.image)
+                # Load image first, to know if it's from atlas
+                _ = self.image
+                image = ATLAS.get(self.file, kind='luma') if self._atlas_loaded else None
+                if image is None:
+                    image = rgb2luma(self.image)
+                self._image_luma = image
 
         return self._image_luma
 
     @image.setter
     def image(self, value):
         self._image = value
+        self._atlas_loaded = False
 
     def resource_release(self):
         super().resource_release()
         self._image = None
         self._image_binary = None
         self._image_luma = None
+        self._atlas_loaded = False
 
     def pre_process(self, image):
         """
@@ -1,15 +1,17 @@
+import asyncio
 import copy
-import operator
 import threading
+import time
 from datetime import datetime, timedelta
 
 import pywebio
 
-from module.base.filter import Filter
+from module.base.profiler import profile
 from module.config.config_generated import GeneratedConfig
 from module.config.config_manual import ManualConfig, OutputConfig
 from module.config.config_updater import ConfigUpdater, ensure_time, get_server_next_update, nearest_future
 from module.config.deep import deep_get, deep_set
+from module.config.scheduler import TaskScheduler
 from module.config.utils import DEFAULT_TIME, dict_to_kv, filepath_config, get_os_reset_remain, path_to_arg
 from module.config.watcher import ConfigWatcher
 from module.exception import RequestHumanTakeover, ScriptError
@@ -66,15 +68,26 @@ class AzurLaneConfig(ConfigUpdater, ManualConfig, GeneratedConfig, ConfigWatcher
 
     def __setattr__(self, key, value):
         if key in self.bound:
-            path = self.bound[key]
-            self.modified[path] = value
-            if self.auto_update:
-                self.update()
+            with self._write_lock:
+                path = self.bound[key]
+                self.modified[path] = value
+                if self.auto_update:
+                    if self.CONFIG_WRITE_DEBOUNCE > 0:
+                        # Apply in memory now, write later
+                        deep_set(self.data, keys=path, value=value)
+                        self.scheduler_update(path)
+                        if key not in self.overridden:
+                            super().__setattr__(key, value)
+                        self.update_later()
+                    else:
+                        self.update()
         else:
             super().__setattr__(key, value)
 
     def __init__(self, config_name, task=None):
         logger.attr("Server", self.SERVER)
+        # Guards modifications against the delayed write in `write_pending()`, see `__deepcopy__()`
+        self._write_lock = threading.RLock()
         # This will read ./config/<config_name>.json
         self.config_name = config_name
         # Raw json data in yaml file.
@@ -86,6 +99,8 @@ class AzurLaneConfig(ConfigUpdater, ManualConfig, GeneratedConfig, ConfigWatcher
         self.bound = {}
         # If write after every variable modification.
         self.auto_update = True
+        # Time of the first modification waiting to be written, see `update_later()`
+        self.pending_since = None
         # Force override variables
         # Key: Argument name in GeneratedConfig. Value: Modified value.
         self.overridden = {}
@@ -94,6 +109,8 @@ class AzurLaneConfig(ConfigUpdater, ManualConfig, GeneratedConfig, ConfigWatcher
         # waiting_task: Run time haven't been reached, wait needed.
         self.pending_task = []
         self.waiting_task = []
+        # Enabled tasks ordered by NextRun, kept in sync with `data`
+        self.scheduler = TaskScheduler()
         # Task to run and bind.
         # Task means the name of the function to run in AzurLaneAutoScript class.
         self.task: Function
@@ -108,6 +125,18 @@ class AzurLaneConfig(ConfigUpdater, ManualConfig, GeneratedConfig, ConfigWatcher
         self._disable_task_switch = False
         self.init_task(task)
 
+    def __deepcopy__(self, memo):
+        # Locks can't be copied, copies get their own
+        new = self.__class__.__new__(self.__class__)
+        memo[id(self)] = new
+        for key, value in self.__dict__.items():
+            if key == '_write_lock':
+                value = threading.RLock()
+            else:
+                value = copy.deepcopy(value, memo)
+            object.__setattr__(new, key, value)
+        return new
+
     def init_task(self, task=None):
         if self.is_template_config:
             return
@@ -124,11 +153,24 @@ class AzurLaneConfig(ConfigUpdater, ManualConfig, GeneratedConfig, ConfigWatcher
         self.save()
 
     def load(self):
+        self.mark_synced()
         self.data = self.read_file(self.config_name)
         self.config_override()
 
         for path, value in self.modified.items():
             deep_set(self.data, keys=path, value=value)
+        self.scheduler.load(self.data, function=Function)
+
+    def scheduler_update(self, path):
+        """
+        Update scheduler after modifying `data`.
+
+        Args:
+            path (str): Such as `Commission.Scheduler.NextRun`
+        """
+        task, _, path = path.partition('.')
+        if path.startswith('Scheduler.'):
+            self.scheduler.update(task)
 
     def bind(self, func, func_list=None):
         """
@@ -204,42 +246,23 @@ class AzurLaneConfig(ConfigUpdater, ManualConfig, GeneratedConfig, ConfigWatcher
         """
         Calculate tasks, set pending_task and waiting_task
         """
-        pending = []
-        waiting = []
-        error = []
         now = datetime.now()
         if AzurLaneConfig.is_hoarding_task:
             now -= self.hoarding
-        for func in self.data.values():
-            func = Function(func)
-            if not func.enable:
-                continue
-            if not isinstance(func.next_run, datetime):
-                error.append(func)
-            elif func.next_run < now:
-                pending.append(func)
-            else:
-                waiting.append(func)
-
-        f = Filter(regex=r"(.*)", attr=["command"])
-        f.load(self.SCHEDULER_PRIORITY)
-        if pending:
-            pending = f.apply(pending)
-        if waiting:
-            waiting = f.apply(waiting)
-            waiting = sorted(waiting, key=operator.attrgetter("next_run"))
-        if error:
-            pending = error + pending
-
-        self.pending_task = pending
-        self.waiting_task = waiting
+        self.scheduler.set_priority(self.SCHEDULER_PRIORITY)
+        self.pending_task = self.scheduler.pending(now)
+        self.waiting_task = self.scheduler.waiting(now)
 
     def get_next(self):
         """
         Returns:
             Function: Command to run
         """
-        self.get_next_task()
+        now = datetime.now()
+        if AzurLaneConfig.is_hoarding_task:
+            now -= self.hoarding
+        self.scheduler.set_priority(self.SCHEDULER_PRIORITY)
+        self.pending_task = self.scheduler.pending(now)
 
         if self.pending_task:
             AzurLaneConfig.is_hoarding_task = False
@@ -250,9 +273,10 @@ class AzurLaneConfig(ConfigUpdater, ManualConfig, GeneratedConfig, ConfigWatcher
         else:
             AzurLaneConfig.is_hoarding_task = True
 
-        if self.waiting_task:
+        task = self.scheduler.first_waiting()
+        if task is not None:
             logger.info("No task pending")
-            task = copy.deepcopy(self.waiting_task[0])
+            task = copy.copy(task)
             task.next_run = (task.next_run + self.hoarding).replace(microsecond=0)
             logger.attr("Task", task)
             return task
@@ -261,25 +285,106 @@ class AzurLaneConfig(ConfigUpdater, ManualConfig, GeneratedConfig, ConfigWatcher
             logger.critical("请启用至少一个任务")
             raise RequestHumanTakeover
 
+    @profile('config', 'save')
     def save(self, mod_name='alas'):
-        if not self.modified:
-            return False
+        with self._write_lock:
+            if not self.modified:
+                return False
 
-        for path, value in self.modified.items():
-            deep_set(self.data, keys=path, value=value)
+            for path, value in self.modified.items():
+                deep_set(self.data, keys=path, value=value)
+                self.scheduler_update(path)
 
-        logger.info(
-            f"Save config {filepath_config(self.config_name, mod_name)}, {dict_to_kv(self.modified)}"
-        )
-        # Don't use self.modified = {}, that will create a new object.
-        self.modified.clear()
-        self.write_file(self.config_name, data=self.data)
+            logger.info(
+                f"Save config {filepath_config(self.config_name, mod_name)}, {dict_to_kv(self.modified)}"
+            )
+            # Don't use self.modified = {}, that will create a new object.
+            self.modified.clear()
+            self.pending_since = None
+            self.write_file(self.config_name, data=self.data)
+            self.mark_synced()
 
     def update(self):
-        self.load()
-        self.config_override()
-        self.bind(self.task)
-        self.save()
+        with self._write_lock:
+            if self.data and not self.changed_since_synced():
+                # File is not modified by others, `self.data` is still the latest.
+                # Skip reading and migrating the whole config file.
+                for path, value in self.modified.items():
+                    deep_set(self.data, keys=path, value=value)
+                    self.scheduler_update(path)
+            else:
+                self.load()
+                self.config_override()
+            self.bind(self.task)
+            self.save()
+
+    def update_later(self):
+        """
+        Write modifications `CONFIG_WRITE_DEBOUNCE` seconds after the first one waiting,
+        modifications within it are written together.
+        """
+        with self._write_lock:
+            if self.pending_since is None:
+                self.pending_since = time.time()
+            elif time.time() - self.pending_since >= self.CONFIG_WRITE_DEBOUNCE:
+                # Delayed write hasn't run yet, executor may be busy
+                self.update()
+                return
+            else:
+                return
+        try:
+            from module.base.async_executor import async_executor
+            async_executor.submit(self._flush_later)
+        except Exception as e:
+            logger.warning(f'Failed to schedule config write: {e}')
+            self.flush()
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.CONFIG_WRITE_DEBOUNCE)
+        self.write_pending()
+
+    def write_pending(self):
+        """
+        Write modifications delayed by `update_later()` into file, called by the delayed write on AsyncExecutor.
+
+        Unlike `update()`, it doesn't load, override or bind, attributes are left to the task thread.
+        Modifications are already applied to `self.data` in `__setattr__()`.
+        If file is modified by others, modifications are written on top of the file,
+        and it's not marked as synced, so the next `update()` on task thread will reload it.
+        """
+        with self._write_lock:
+            if self.pending_since is None or not self.modified:
+                self.pending_since = None
+                return
+            try:
+                synced = bool(self.data) and not self.changed_since_synced()
+                data = self.data if synced else self.read_file(self.config_name)
+                for path, value in self.modified.items():
+                    deep_set(data, keys=path, value=value)
+                logger.info(
+                    f"Save config {filepath_config(self.config_name)}, {dict_to_kv(self.modified)}"
+                )
+                self.modified.clear()
+                self.pending_since = None
+                self.write_file(self.config_name, data=data)
+                if synced:
+                    self.mark_synced()
+            except Exception as e:
+                logger.warning(f'Failed to write config modifications: {e}')
+
+    def flush(self):
+        """
+        Write modifications delayed by `update_later()` and reload if needed.
+        Called on task thread at task boundaries.
+        """
+        with self._write_lock:
+            if self.pending_since is None or not self.modified:
+                self.pending_since = None
+                return
+            try:
+                self.update()
+            except Exception as e:
+                logger.warning(f'Failed to flush config modifications: {e}')
 
     def override(self, **kwargs):
         now = datetime.now().replace(microsecond=0)
@@ -295,6 +400,7 @@ class AzurLaneConfig(ConfigUpdater, ManualConfig, GeneratedConfig, ConfigWatcher
                 )
                 if isinstance(next_run, datetime) and next_run > limit:
                     deep_set(self.data, keys=f"{task}.Scheduler.NextRun", value=now)
+                    self.scheduler_update(f"{task}.Scheduler.NextRun")
 
         limit_next_run(["Commission", "Reward"], limit=now + timedelta(hours=12, seconds=-1))
         limit_next_run(["Research"], limit=now + timedelta(hours=24, seconds=-1))
@@ -604,6 +710,7 @@ class AzurLaneConfig(ConfigUpdater, ManualConfig, GeneratedConfig, ConfigWatcher
         if self.stop_event is not None:
             if self.stop_event.is_set():
                 return True
+        self.flush()
         prev = self.task
         self.load()
         new = self.get_next()
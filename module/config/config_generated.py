@@ -114,6 +114,7 @@ class GeneratedConfig:
     Optimization_CombatScreenshotInterval = 1.0
     Optimization_TaskHoardingDuration = 0
     Optimization_WhenTaskQueueEmpty = 'goto_main'  # stay_there, goto_main, close_game
+    Optimization_ProfileSampling = False
 
     # Group `DropRecord`
     DropRecord_SaveFolder = './screenshots'
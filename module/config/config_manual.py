@@ -85,6 +85,8 @@ class ManualConfig:
     module.base
     """
     BUTTON_OFFSET = 30
+    # Memorize appear() results on the same screenshot, see module.base.frame.FrameDetection
+    BUTTON_FRAME_CACHE = True
     WAIT_BEFORE_SAVING_SCREEN_SHOT = 1
 
     """
@@ -113,10 +115,30 @@ class ManualConfig:
     LV32_TRIGGERED = False
     STOP_IF_REACH_LV32 = False
 
+    """
+    module.config
+    """
+    # Seconds to delay config writes from attribute setting, modifications within it are written together.
+    # 0 to write on every modification. See AzurLaneConfig.update_later()
+    # Modifications waiting are lost if Alas is killed, such as "Stop" in GUI, keep it short.
+    CONFIG_WRITE_DEBOUNCE = 2
+
     """
     module.device
     """
     DEVICE_OVER_HTTP = False
+    # Skip detection on screenshots identical to the previous one, see Screenshot._frame_change_check()
+    SCREENSHOT_CHANGE_DETECTION = False
+    # Max pixel difference (0~255) to consider two screenshots as identical
+    SCREENSHOT_CHANGE_THRESHOLD = 0
+    # Capture the next screenshot at background while handlers are running, see module.device.screenshot_prefetch
+    # Capture and control run in different threads, enable it only if your screenshot method is thread-safe
+    SCREENSHOT_PREFETCH = False
+    # Max memory of compressed screenshots kept for error logs, see module.device.screenshot_buffer
+    SCREENSHOT_BUFFER_MAX_BYTES = 256 * 1024 * 1024
+    # Folder to record screenshots and controls, to be replayed by module.device.replay_device.ReplayDevice
+    # '' to disable
+    DEVICE_REPLAY_RECORD = ''
     FORWARD_PORT_RANGE = (20000, 21000)
     REVERSE_SERVER_PORT = 7903
 
@@ -252,6 +274,8 @@ class ManualConfig:
     DETECTING_AREA = (123, 55, 1280, 720)
     SCREEN_CENTER = (SCREEN_SIZE[0] / 2, SCREEN_SIZE[1] / 2)
     DETECTION_BACKEND = 'homography'
+    # Predict grids together in View.predict(), see module.map_detection.grid_batch
+    MAP_GRID_BATCH_PREDICT = True
     # In event_20200723_cn B3D3, Grid have 1.2x width, images on the grid still remain the same.
     GRID_IMAGE_A_MULTIPLY = 1.0
 
@@ -274,6 +298,11 @@ class ManualConfig:
     HOMO_EDGE_COLOR_RANGE = (0, 33)
     # ((x, y), [upper-left, upper-right, bottom-left, bottom-right])
     HOMO_STORAGE = None
+    # Search free tiles around the lattice predicted from the previous detection and swipe first,
+    # see Homography.search_tile_track()
+    HOMO_TRACK = True
+    # Max error of predicted lattice in pixels
+    HOMO_TRACK_RADIUS = 25
 
     """
     module.map_detection.perspective
@@ -304,12 +333,28 @@ class ManualConfig:
     # Parameters for perspective calculating
     VANISH_POINT_RANGE = ((540, 740), (-3000, -1000))
     DISTANCE_POINT_X_RANGE = ((-3200, -1600),)
+    # Solve points with module.map_detection.perspective_solver instead of scipy.optimize.brute
+    PERSPECTIVE_SOLVER = True
     # Parameters for line cleansing
     COINCIDENT_POINT_ENCOURAGE_DISTANCE = 3
     ERROR_LINES_TOLERANCE = (-10, 10)
     MID_DIFF_RANGE_H = (129 - 3, 129 + 3)
     MID_DIFF_RANGE_V = (129 - 3, 129 + 3)
 
+    """
+    module.ocr
+    """
+    # Save OCR input images and results into ./ocr_debug, see module.ocr.debug_capture
+    OCR_DEBUG_IMAGE = False
+    # Ratio of OCR calls to be saved, 0-1
+    OCR_DEBUG_IMAGE_SAMPLE = 1.0
+    # Max number of images to keep
+    OCR_DEBUG_IMAGE_LIMIT = 100
+    # Reuse OCR results of identical preprocessed images, see module.ocr.ocr_cache
+    OCR_CACHE = True
+    # Max number of OCR results to keep
+    OCR_CACHE_SIZE = 256
+
     """
     module.os
     """
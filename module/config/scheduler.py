@@ -0,0 +1,163 @@
+import heapq
+from datetime import datetime
+
+from module.base.filter import Filter
+
+
+def compile_priority(priority):
+    """
+    Args:
+        priority (str): Such as `SCHEDULER_PRIORITY`, "Restart > Commission > Tactical"
+
+    Returns:
+        dict: Key: lowercase task name. Value: int, rank, the smaller the higher.
+            Tasks not in priority are not scheduled, same as `Filter.apply()`.
+    """
+    f = Filter(regex=r"(.*)", attr=["command"])
+    f.load(priority)
+    rank = {}
+    for index, filter in enumerate(f.filter):
+        rank.setdefault(filter[0], index)
+    return rank
+
+
+class TaskScheduler:
+    """
+    Enabled tasks in a heap keyed by (Scheduler.NextRun, priority rank).
+
+    The heap is rebuilt when config is loaded from file,
+    and updated task by task when `Scheduler.NextRun` or `Scheduler.Enable` is modified.
+    Outdated heap entries are skipped on read and dropped when the heap gets too large.
+
+    Examples:
+        scheduler = TaskScheduler()
+        scheduler.set_priority(config.SCHEDULER_PRIORITY)
+        scheduler.load(config.data, function=Function)
+        pending = scheduler.pending(now=datetime.now())
+        task = scheduler.first_waiting()
+    """
+
+    def __init__(self):
+        self.priority = None
+        self.rank = {}
+        self.function = None
+        self.data = {}
+        # Key: task name. Value: (Function, seq)
+        self.tasks = {}
+        # Tasks with invalid NextRun. Key: task name. Value: Function
+        self.error = {}
+        # Entries: (next_run, rank, seq, task name)
+        self.heap = []
+        self._seq = 0
+
+    def set_priority(self, priority):
+        """
+        Args:
+            priority (str):
+
+        Returns:
+            bool: If priority changed.
+        """
+        if priority == self.priority:
+            return False
+        self.priority = priority
+        self.rank = compile_priority(priority)
+        if self.function is not None:
+            self.load(self.data, function=self.function)
+        return True
+
+    def load(self, data, function):
+        """
+        Rebuild from config data.
+
+        Args:
+            data (dict): `AzurLaneConfig.data`
+            function (type): `Function` class.
+        """
+        self.function = function
+        self.data = data
+        self.tasks.clear()
+        self.error.clear()
+        self.heap = []
+        for command in data.keys():
+            self.update(command)
+
+    def update(self, command):
+        """
+        Re-read a task from config data.
+
+        Args:
+            command (str): Task name.
+        """
+        self.tasks.pop(command, None)
+        self.error.pop(command, None)
+        if self.function is None:
+            return
+        func = self.function(self.data.get(command, {}))
+        if not func.enable:
+            return
+        rank = self.rank.get(func.command.lower())
+        if not isinstance(func.next_run, datetime):
+            # Invalid NextRun is pending at the highest priority, same as before scheduling
+            self.error[command] = func
+            return
+        if rank is None:
+            return
+
+        self._seq += 1
+        self.tasks[command] = (func, self._seq)
+        heapq.heappush(self.heap, (func.next_run, rank, self._seq, command))
+        if len(self.heap) > 2 * len(self.tasks) + 16:
+            self.heap = [entry for entry in self.heap if self._is_valid(entry)]
+            heapq.heapify(self.heap)
+
+    def _is_valid(self, entry):
+        task = self.tasks.get(entry[3])
+        return task is not None and task[1] == entry[2]
+
+    def pending(self, now):
+        """
+        Args:
+            now (datetime):
+
+        Returns:
+            list[Function]: Tasks with invalid NextRun first, then tasks that NextRun < now, ordered by priority.
+        """
+        pending = []
+        # Walk the heap from root, children are only visited if parent is before now
+        stack = [0] if self.heap else []
+        while stack:
+            index = stack.pop()
+            entry = self.heap[index]
+            if entry[0] >= now:
+                continue
+            if self._is_valid(entry):
+                pending.append(entry)
+            for child in (2 * index + 1, 2 * index + 2):
+                if child < len(self.heap):
+                    stack.append(child)
+
+        pending.sort(key=lambda e: e[1])
+        return list(self.error.values()) + [self.tasks[entry[3]][0] for entry in pending]
+
+    def first_waiting(self):
+        """
+        Returns:
+            Function: Task that runs next if nothing is pending, or None if no task enabled.
+        """
+        while self.heap and not self._is_valid(self.heap[0]):
+            heapq.heappop(self.heap)
+        if not self.heap:
+            return None
+        return self.tasks[self.heap[0][3]][0]
+
+    def waiting(self, now):
+        """
+        Args:
+            now (datetime):
+
+        Returns:
+            list[Function]: Tasks that NextRun >= now, ordered by NextRun then priority.
+        """
+        entries = sorted(entry for entry in self.heap if entry[0] >= now and self._is_valid(entry))
+        return [self.tasks[entry[3]][0] for entry in entries]
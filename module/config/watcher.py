@@ -8,6 +8,8 @@ from module.logger import logger
 class ConfigWatcher:
     config_name = 'alas'
     start_mtime = DEFAULT_TIME
+    # st_mtime_ns when the file was last read or written by this instance
+    synced_mtime_ns = None
 
     def start_watching(self) -> None:
         self.start_mtime = self.get_mtime()
@@ -31,3 +33,28 @@ class ConfigWatcher:
             return True
         else:
             return False
+
+    def mark_synced(self) -> None:
+        """
+        Record the file state after reading or writing it.
+        """
+        try:
+            self.synced_mtime_ns = os.stat(filepath_config(self.config_name)).st_mtime_ns
+        except FileNotFoundError:
+            self.synced_mtime_ns = None
+
+    def changed_since_synced(self) -> bool:
+        """
+        Like `should_reload()` but compares with the last read or write of this instance in nanoseconds,
+        so modifications from GUI in the same second are not missed.
+
+        Returns:
+            bool: Whether the file has been modified by others
+        """
+        if self.synced_mtime_ns is None:
+            return True
+        try:
+            mtime = os.stat(filepath_config(self.config_name)).st_mtime_ns
+        except FileNotFoundError:
+            return True
+        return mtime != self.synced_mtime_ns
@@ -1,5 +1,6 @@
 from module.base.button import Button
 from module.base.decorator import cached_property
+from module.base.profiler import profiler
 from module.base.timer import Timer
 from module.base.utils import *
 from module.device.method.hermit import Hermit
@@ -15,6 +16,14 @@ class Control(Hermit, Minitouch, Scrcpy, MaaTouch, NemuIpc):
         # Will be overridden in Device
         pass
 
+    def handle_control_done(self):
+        # Will be overridden in Device
+        pass
+
+    def replay_record(self, kind, name, points):
+        # Will be overridden in Device
+        pass
+
     @cached_property
     def click_methods(self):
         return {
@@ -44,7 +53,10 @@ class Control(Hermit, Minitouch, Scrcpy, MaaTouch, NemuIpc):
             self.config.Emulator_ControlMethod,
             self.click_adb
         )
-        method(x, y)
+        with profiler.measure('click', str(button)):
+            method(x, y)
+        self.replay_record('click', button, [(x, y)])
+        self.handle_control_done()
 
     def multi_click(self, button, n, interval=(0.1, 0.2)):
         self.handle_control_check(button)
@@ -84,6 +96,8 @@ class Control(Hermit, Minitouch, Scrcpy, MaaTouch, NemuIpc):
             self.long_click_nemu_ipc(x, y, duration)
         else:
             self.swipe_adb((x, y), (x, y), duration)
+        self.replay_record('long_click', button, [(x, y)])
+        self.handle_control_done()
 
     def swipe(self, p1, p2, duration=(0.1, 0.2), name='SWIPE', distance_check=True):
         self.handle_control_check(name)
@@ -118,6 +132,8 @@ class Control(Hermit, Minitouch, Scrcpy, MaaTouch, NemuIpc):
             self.swipe_nemu_ipc(p1, p2)
         else:
             self.swipe_adb(p1, p2, duration=duration)
+        self.replay_record('swipe', name, [p1, p2])
+        self.handle_control_done()
 
     def swipe_vector(self, vector, box=(123, 159, 1175, 628), random_range=(0, 0, 0, 0), padding=15,
                      duration=(0.1, 0.2), whitelist_area=None, blacklist_area=None, name='SWIPE', distance_check=True):
@@ -171,4 +187,9 @@ class Control(Hermit, Minitouch, Scrcpy, MaaTouch, NemuIpc):
             logger.warning(f'Control method {method} does not support drag well, '
                            f'falling back to ADB swipe may cause unexpected behaviour')
             self.swipe_adb(p1, p2, duration=ensure_time(swipe_duration * 2))
+            # Recorded as a click named in `name`
             self.click(Button(area=(), color=(), button=area_offset(point_random, p2), name=name), False)
+            self.handle_control_done()
+            return
+        self.replay_record('drag', name, [p1, p2])
+        self.handle_control_done()
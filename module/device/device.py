@@ -13,12 +13,14 @@ from module.device.pkg_resources import get_distribution
 # Just avoid being removed by import optimization
 _ = get_distribution
 
+from module.base.decorator import cached_property
 from module.base.timer import Timer
 from module.config.utils import get_server_next_update
 from module.device.app_control import AppControl
 from module.device.control import Control
 from module.device.input import Input
 from module.device.platform import Platform
+from module.device.replay import ReplayRecorder
 from module.device.screenshot import Screenshot
 from module.exception import (EmulatorNotRunningError, GameNotRunningError, GameStuckError, GameTooManyClickError,
                               RequestHumanTakeover)
@@ -265,8 +267,28 @@ class Device(Screenshot, Control, AppControl, Input):
         if self.handle_night_commission():
             super().screenshot()
 
+        if self.replay_recorder is not None and self._replay_frame_id != self.frame_id:
+            self._replay_frame_id = self.frame_id
+            self.replay_recorder.frame(self.image)
+
         return self.image
 
+    _replay_frame_id = 0
+
+    @cached_property
+    def replay_recorder(self):
+        """
+        Returns:
+            ReplayRecorder: Or None if DEVICE_REPLAY_RECORD is not set.
+        """
+        if self.config.DEVICE_REPLAY_RECORD:
+            return ReplayRecorder(self.config.DEVICE_REPLAY_RECORD)
+        return None
+
+    def replay_record(self, kind, name, points):
+        if self.replay_recorder is not None:
+            self.replay_recorder.control(kind, name, points)
+
     def dump_hierarchy(self) -> etree._Element:
         self.stuck_record_check()
         return super().dump_hierarchy()
@@ -327,6 +349,9 @@ class Device(Screenshot, Control, AppControl, Input):
         self.click_record_add(button)
         self.click_record_check()
 
+    def handle_control_done(self):
+        self.screenshot_prefetch_invalidate()
+
     def click_record_add(self, button):
         self.click_record.append(str(button))
 
@@ -393,6 +418,7 @@ class Device(Screenshot, Control, AppControl, Input):
         super().app_start()
         self.stuck_record_clear()
         self.click_record_clear()
+        self.screenshot_prefetch_invalidate()
 
     def app_stop(self):
         if not self.config.Error_HandleError:
@@ -402,3 +428,4 @@ class Device(Screenshot, Control, AppControl, Input):
         super().app_stop()
         self.stuck_record_clear()
         self.click_record_clear()
+        self.screenshot_prefetch_invalidate()
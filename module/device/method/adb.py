@@ -1,4 +1,5 @@
 import re
+import sys
 import time
 from functools import wraps
 
@@ -7,7 +8,7 @@ import numpy as np
 from adbutils.errors import AdbError
 from lxml import etree
 
-from module.base.decorator import Config
+from module.base.decorator import Config, cached_property
 from module.config.server import DICT_PACKAGE_TO_ACTIVITY
 from module.device.connection import Connection
 from module.device.method.utils import (ImageTruncated, PackageNotInstalled, RETRY_TRIES, handle_adb_error,
@@ -84,10 +85,52 @@ def retry(func):
     return retry_wrapper
 
 
-def load_screencap(data):
+class ScreencapBuffer:
+    """
+    Preallocated output buffers of `load_screencap()`, grouped by resolution.
+
+    Screenshots are held by many others after being returned, such as `Screenshot.image`,
+    the error screenshot buffer and the prefetched frame, so a buffer is reused only if
+    nobody else is referencing it. Views of the buffer hold a reference to it as well.
+    """
+    # Max number of buffers of each resolution
+    POOL_SIZE = 4
+
+    def __init__(self):
+        # Key: (height, width). Value: list of np.ndarray.
+        self.pool = {}
+
+    def get(self, height, width):
+        """
+        Args:
+            height (int):
+            width (int):
+
+        Returns:
+            np.ndarray: Buffer in shape (height, width, 3), content is undefined
+        """
+        key = (height, width)
+        buffers = self.pool.setdefault(key, [])
+        for buffer in buffers:
+            # References from `buffers` and the argument of getrefcount()
+            # plus one from the loop variable
+            if sys.getrefcount(buffer) <= 3:
+                return buffer
+
+        buffer = np.empty((height, width, 3), dtype=np.uint8)
+        if len(buffers) < self.POOL_SIZE:
+            buffers.append(buffer)
+        return buffer
+
+    def clear(self):
+        self.pool = {}
+
+
+def load_screencap(data, buffer=None):
     """
     Args:
         data: Raw data from `screencap`
+        buffer (ScreencapBuffer): Convert image into a reusable buffer to avoid allocation
 
     Returns:
         np.ndarray:
@@ -107,13 +150,42 @@ def load_screencap(data):
         # ValueError: cannot reshape array of size 0 into shape (720,1280,4)
         raise ImageTruncated(str(e))
 
-    image = cv2.cvtColor(image, cv2.COLOR_BGRA2BGR)
+    if buffer is not None:
+        dst = buffer.get(int(height), int(width))
+        image = cv2.cvtColor(image, cv2.COLOR_BGRA2BGR, dst=dst)
+    else:
+        image = cv2.cvtColor(image, cv2.COLOR_BGRA2BGR)
     if image is None:
         raise ImageTruncated('Empty image after cv2.cvtColor')
 
     return image
 
 
+def png_line_ending(data):
+    """
+    Detect how line endings in PNG data are converted by adb shell, from PNG signature `\x89PNG\r\n\x1a\n`.
+
+    Args:
+        data (bytes): Data from `screencap -p`
+
+    Returns:
+        int: Method in `Adb.__load_screenshot()`, 0 for unchanged, 1 for `\r\n` and 2 for `\r\r\n`.
+            None if unknown.
+    """
+    # There might be a prefix before signature, such as vmos pro
+    start = data.find(b'\x89PNG', 0, 64)
+    if start < 0:
+        return None
+    signature = data[start + 4:start + 12]
+    if signature.startswith(b'\r\n\x1a\n'):
+        return 0
+    if signature.startswith(b'\r\r\n\x1a\r\n'):
+        return 1
+    if signature.startswith(b'\r\r\r\n\x1a\r\r\n'):
+        return 2
+    return None
+
+
 class Adb(Connection):
     __screenshot_method = [0, 1, 2]
     __screenshot_method_fixed = [0, 1, 2]
@@ -149,10 +221,16 @@ class Adb(Connection):
         return image
 
     def __process_screenshot(self, screenshot):
-        for method in self.__screenshot_method_fixed:
+        # Try the detected method first, then the one worked last time
+        methods = self.__screenshot_method_fixed
+        detected = png_line_ending(screenshot)
+        if detected is not None and detected != methods[0]:
+            methods = [detected] + [m for m in methods if m != detected]
+        for method in methods:
             try:
                 result = self.__load_screenshot(screenshot, method=method)
-                self.__screenshot_method_fixed = [method] + self.__screenshot_method
+                if method != self.__screenshot_method_fixed[0]:
+                    self.__screenshot_method_fixed = [method] + [m for m in self.__screenshot_method if m != method]
                 return result
             except (OSError, ImageTruncated):
                 continue
@@ -162,6 +240,10 @@ class Adb(Connection):
             logger.warning(f'Unexpected screenshot: {screenshot}')
         raise OSError(f'cannot load screenshot')
 
+    @cached_property
+    def screencap_buffer(self):
+        return ScreencapBuffer()
+
     @retry
     @Config.when(DEVICE_OVER_HTTP=False)
     def screenshot_adb(self):
@@ -178,7 +260,7 @@ class Adb(Connection):
         if len(data) < 500:
             logger.warning(f'Unexpected screenshot: {data}')
 
-        return load_screencap(data)
+        return load_screencap(data, buffer=self.screencap_buffer)
 
     @retry
     def screenshot_adb_nc(self):
@@ -186,7 +268,7 @@ class Adb(Connection):
         if len(data) < 500:
             logger.warning(f'Unexpected screenshot: {data}')
 
-        return load_screencap(data)
+        return load_screencap(data, buffer=self.screencap_buffer)
 
     @retry
     def click_adb(self, x, y):
@@ -0,0 +1,218 @@
+import json
+import os
+import re
+from datetime import datetime
+from functools import lru_cache
+
+from module.base.async_executor import async_executor
+from module.base.utils import load_image, save_image
+from module.exception import ReplayEnd
+from module.logger import logger
+
+REPLAY_FILE = 'replay.jsonl'
+# Screenshots in error logs, see AzurLaneAutoScript.save_error_log()
+ERROR_IMAGE_FORMAT = '%Y-%m-%d_%H-%M-%S-%f'
+ERROR_LOG_FORMAT = '%Y-%m-%d %H:%M:%S.%f'
+ERROR_LOG_CONTROL = re.compile(
+    r'^(?P<time>\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\.\d{3}) \| INFO \| '
+    # Controls are logged with points, such as `Click ( 100,  200) @ BUTTON`,
+    # this excludes `Swipe distance < 10px, dropped`
+    r'(?P<kind>Click|Swipe|Drag) (?P<text>\(.*)$'
+)
+# Control.drag() falls back to ADB swipe and a click, logged as `Drag` then `Click`
+ERROR_LOG_DRAG_FALLBACK = re.compile(r'\| WARNING \| Control method .* does not support drag well')
+
+
+class ReplayRecorder:
+    """
+    Record screenshots and controls of a running device, to be served by `ReplaySession`.
+
+    Frames are saved as png in background, events are appended to `replay.jsonl` line by line,
+    so recordings are still readable if Alas is killed.
+
+    Examples:
+        recorder = ReplayRecorder('./log/replay/main')
+        recorder.frame(device.image)
+        recorder.control('click', 'GOTO_MAIN', (100, 200))
+    """
+
+    def __init__(self, folder):
+        """
+        Args:
+            folder (str): Folder to save recording, created if not exists.
+        """
+        self.folder = folder
+        os.makedirs(folder, exist_ok=True)
+        self.count = 0
+        logger.info(f'Recording replay to {folder}')
+
+    def _append(self, event):
+        with open(os.path.join(self.folder, REPLAY_FILE), 'a', encoding='utf-8') as f:
+            f.write(json.dumps(event) + '\n')
+
+    def frame(self, image):
+        """
+        Args:
+            image (np.ndarray): Screenshot.
+        """
+        self.count += 1
+        file = f'{self.count:06d}.png'
+        async_executor.submit(save_image, image, os.path.join(self.folder, file))
+        self._append({'type': 'frame', 'file': file})
+
+    def control(self, kind, name, points):
+        """
+        Args:
+            kind (str): 'click', 'long_click', 'swipe' or 'drag'.
+            name (str): Button name.
+            points (tuple): Points in control.
+        """
+        self._append({'type': kind, 'name': str(name), 'points': [list(p) for p in points]})
+
+
+class ReplaySession:
+    """
+    Recorded screenshots served as a state machine.
+
+    Screenshots are split into segments by controls.
+    Within a segment, frames are served in order and the last one is repeated,
+    a control moves to the next segment, no matter how long the script has waited.
+    So the same recording gives the same sequence of screens on every run.
+
+    Examples:
+        session = ReplaySession('./log/error/alas/1700000000000')
+        image = session.screenshot()
+        session.control('click', 'GOTO_MAIN')
+    """
+
+    def __init__(self, folder):
+        """
+        Args:
+            folder (str): Folder recorded by `ReplayRecorder`, or an error log folder.
+        """
+        self.folder = folder
+        if os.path.exists(os.path.join(folder, REPLAY_FILE)):
+            events = self._load_recording(folder)
+        else:
+            events = self._load_error_log(folder)
+
+        # segments[i] are frames before controls[i]
+        self.segments = [[]]
+        self.controls = []
+        for event in events:
+            if event['type'] == 'frame':
+                self.segments[-1].append(event['file'])
+            else:
+                self.controls.append(event)
+                self.segments.append([])
+        # Controls without frames between them
+        for index, segment in enumerate(self.segments):
+            if not segment and index > 0:
+                segment.append(self.segments[index - 1][-1])
+        if not self.segments[0]:
+            raise ReplayEnd(f'No screenshots in replay folder: {folder}')
+
+        self.segment = 0
+        self.cursor = 0
+        logger.info(f'Replay loaded: {folder}, '
+                    f'{sum(len(s) for s in self.segments)} frames, {len(self.controls)} controls')
+
+    @staticmethod
+    def _load_recording(folder):
+        events = []
+        with open(os.path.join(folder, REPLAY_FILE), 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    events.append(json.loads(line))
+        return events
+
+    @staticmethod
+    def _load_error_log(folder):
+        """
+        Merge screenshots and controls in log.txt by time.
+        """
+        timeline = []
+        for file in os.listdir(folder):
+            name, ext = os.path.splitext(file)
+            if ext != '.png':
+                continue
+            try:
+                time = datetime.strptime(name, ERROR_IMAGE_FORMAT)
+            except ValueError:
+                continue
+            timeline.append((time, 0, {'type': 'frame', 'file': file}))
+
+        log = os.path.join(folder, 'log.txt')
+        if os.path.exists(log):
+            with open(log, 'r', encoding='utf-8') as f:
+                # Drag that falls back to ADB, the next click belongs to it
+                drag = None
+                for line in f:
+                    line = line.strip()
+                    res = ERROR_LOG_CONTROL.match(line)
+                    if not res:
+                        if drag is None and ERROR_LOG_DRAG_FALLBACK.search(line):
+                            drag = timeline[-1][2] if timeline and timeline[-1][2]['type'] == 'drag' else None
+                        continue
+                    time = datetime.strptime(res.group('time'), ERROR_LOG_FORMAT)
+                    kind = res.group('kind').lower()
+                    # Click ( 100,  200) @ BUTTON, Swipe ( 100,  200) -> ( 300,  200)
+                    name = res.group('text').partition(' @ ')[2].partition(',')[0] or kind.upper()
+                    if drag is not None:
+                        if kind == 'click':
+                            # Merged into the drag, ReplayDevice.drag() moves once.
+                            # Drag logs have no name, take it from the click
+                            drag['name'] = name
+                            drag = None
+                            continue
+                        drag = None
+                    timeline.append((time, 1, {'type': kind, 'name': name, 'points': []}))
+
+        # Frames captured at the same time as a control are before it
+        timeline.sort(key=lambda row: row[:2])
+        # log.txt covers the whole task but only the last screenshots are saved,
+        # controls before the first screenshot can't be replayed
+        for index, row in enumerate(timeline):
+            if row[1] == 0:
+                timeline = timeline[index:]
+                break
+        return [row[2] for row in timeline]
+
+    @lru_cache(maxsize=64)
+    def _load_frame(self, file):
+        return load_image(os.path.join(self.folder, file))
+
+    def screenshot(self):
+        """
+        Returns:
+            np.ndarray: Current frame.
+        """
+        frames = self.segments[self.segment]
+        file = frames[min(self.cursor, len(frames) - 1)]
+        self.cursor += 1
+        return self._load_frame(file)
+
+    def control(self, kind, name):
+        """
+        Move to the frames after a control.
+
+        Args:
+            kind (str):
+            name (str):
+
+        Raises:
+            ReplayEnd: If no more controls in recording.
+        """
+        if self.segment >= len(self.controls):
+            raise ReplayEnd(f'Replay ended, received {kind} {name}')
+        expected = self.controls[self.segment]
+        if expected['name'] != str(name):
+            logger.warning(f'Replay control mismatched at #{self.segment}, '
+                           f'expected {expected["type"]} {expected["name"]}, received {kind} {name}')
+        self.segment += 1
+        self.cursor = 0
+
+    @property
+    def finished(self):
+        return self.segment >= len(self.controls)
@@ -0,0 +1,118 @@
+import numpy as np
+from lxml import etree
+
+from module.base.timer import Timer
+from module.base.utils import ensure_int, point2str, random_rectangle_point
+from module.config.config import AzurLaneConfig
+from module.device.device import Device
+from module.device.replay import ReplaySession
+from module.logger import logger
+
+
+class ReplayDevice(Device):
+    """
+    A stand-in device that serves recorded screenshots instead of connecting to an emulator.
+
+    Screenshots come from `ReplaySession`, controls move the session to the next recorded screen,
+    so tasks like `UI.ui_goto()` and `Combat.combat_execute()` can run on machines without emulators
+    and be profiled offline.
+
+    Screenshot interval and sleeps are skipped, but timers in handlers still count in real time,
+    a handler waiting for a timer will get the same frame repeatedly until it's reached.
+
+    Examples:
+        device = ReplayDevice('alas', folder='./log/error/alas/1700000000000')
+        ui = UI('alas', device=device)
+        ui.ui_goto_main()
+    """
+
+    def __init__(self, config, folder):
+        """
+        Args:
+            config (AzurLaneConfig, str): Name of the user config under ./config
+            folder (str): Folder recorded by `ReplayRecorder`, or an error log folder.
+        """
+        logger.hr('Device', level=1)
+        if isinstance(config, str):
+            self.config = AzurLaneConfig(config, task=None)
+        else:
+            self.config = config
+        # Don't record a replay when replaying
+        self.config.DEVICE_REPLAY_RECORD = ''
+        self._platform = None
+        self.serial = 'replay'
+        self.package = self.config.Emulator_PackageName
+        self._screenshot_interval = Timer(0)
+        self.replay = ReplaySession(folder)
+        logger.attr('AdbDevice', f'Replay({folder})')
+
+    def _screenshot_capture(self):
+        return self._handle_orientated_image(self.replay.screenshot())
+
+    def screenshot_interval_set(self, interval=None):
+        pass
+
+    @staticmethod
+    def sleep(second):
+        pass
+
+    def click(self, button, control_check=True):
+        if control_check:
+            self.handle_control_check(button)
+        x, y = ensure_int(*random_rectangle_point(button.button))
+        logger.info('Click %s @ %s' % (point2str(x, y), button))
+        self.replay.control('click', button)
+        self.handle_control_done()
+
+    def long_click(self, button, duration=(1, 1.2)):
+        self.handle_control_check(button)
+        logger.info('Long click %s' % button)
+        self.replay.control('long_click', button)
+        self.handle_control_done()
+
+    def swipe(self, p1, p2, duration=(0.1, 0.2), name='SWIPE', distance_check=True):
+        self.handle_control_check(name)
+        p1, p2 = ensure_int(p1, p2)
+        logger.info('Swipe %s -> %s' % (point2str(*p1), point2str(*p2)))
+        if distance_check:
+            if np.linalg.norm(np.subtract(p1, p2)) < 10:
+                # Same as Control.swipe(), dropped swipes are not recorded
+                logger.info('Swipe distance < 10px, dropped')
+                return
+        self.replay.control('swipe', name)
+        self.handle_control_done()
+
+    def drag(self, p1, p2, name='DRAG', **kwargs):
+        self.handle_control_check(name)
+        p1, p2 = ensure_int(p1, p2)
+        logger.info('Drag %s -> %s' % (point2str(*p1), point2str(*p2)))
+        self.replay.control('drag', name)
+        self.handle_control_done()
+
+    def get_orientation(self):
+        return self.orientation
+
+    def release_during_wait(self):
+        pass
+
+    def app_current(self):
+        return self.package
+
+    def app_is_running(self):
+        return True
+
+    def app_start(self):
+        logger.info('App start, skipped in replay')
+
+    def app_stop(self):
+        logger.info('App stop, skipped in replay')
+
+    def dump_hierarchy(self):
+        self.hierarchy = etree.Element('hierarchy')
+        return self.hierarchy
+
+    def ime_shown(self):
+        return False
+
+    def text_input_and_confirm(self, text, clear=False):
+        logger.info(f'Text input, skipped in replay: {text}')
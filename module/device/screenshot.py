@@ -1,6 +1,5 @@
 import os
 import time
-from collections import deque
 from datetime import datetime
 from PIL import Image
 # 此文件定义了截图处理逻辑。
@@ -12,7 +11,9 @@ import queue as _queue
 import cv2
 import numpy as np
 
-from module.base.decorator import cached_property
+from module.base.decorator import cached_property, has_cached_property
+from module.base.frame import FrameDetection
+from module.base.profiler import profiler
 from module.base.timer import Timer
 from module.base.utils import get_color, image_size, limit_in, save_image
 from module.device.method.adb import Adb
@@ -22,6 +23,8 @@ from module.device.method.ldopengl import LDOpenGL
 from module.device.method.nemu_ipc import NemuIpc
 from module.device.method.scrcpy import Scrcpy
 from module.device.method.wsa import WSA
+from module.device.screenshot_buffer import ScreenshotBuffer
+from module.device.screenshot_prefetch import ScreenshotPrefetch
 from module.exception import RequestHumanTakeover, ScriptError
 from module.logger import logger
 
@@ -34,7 +37,38 @@ class Screenshot(Adb, WSA, DroidCast, AScreenCap, Scrcpy, NemuIpc, LDOpenGL):
     _minicap_uninstalled = False
     _screenshot_interval = Timer(0.1)
     _last_save_time = {}
-    image: np.ndarray
+    # Increase on every new image, detection results are memorized per frame
+    frame_id = 0
+    # False if the latest screenshot is identical to the previous one,
+    # only available when SCREENSHOT_CHANGE_DETECTION is enabled
+    frame_changed = True
+    _frame_prev = None
+    # Timestamp when the latest screenshot started to capture
+    frame_timestamp = 0.
+
+    @property
+    def image(self) -> np.ndarray:
+        # Raise AttributeError if no screenshot taken yet
+        return self._image
+
+    @image.setter
+    def image(self, value):
+        self._image = value
+        self._frame_prev = value
+        self.frame_id += 1
+
+    @cached_property
+    def _frame_detection(self):
+        return FrameDetection()
+
+    @property
+    def frame_detection(self) -> FrameDetection:
+        """
+        Detection results on current image, see `FrameDetection`.
+        """
+        detection = self._frame_detection
+        detection.bind(self.image, self.frame_id)
+        return detection
 
     @cached_property
     def screenshot_methods(self):
@@ -55,27 +89,71 @@ class Screenshot(Adb, WSA, DroidCast, AScreenCap, Scrcpy, NemuIpc, LDOpenGL):
     def screenshot_method_override(self) -> str:
         return ''
 
-    def screenshot(self):
+    def _screenshot_capture(self):
         """
+        Take a screenshot with current method, without checks.
+
         Returns:
             np.ndarray:
         """
+        if self.screenshot_method_override:
+            method = self.screenshot_method_override
+        else:
+            method = self.config.Emulator_ScreenshotMethod
+        method = self.screenshot_methods.get(method, self.screenshot_adb)
+
+        image = method()
+
+        if self.config.Emulator_ScreenshotDedithering:
+            # This will take 40-60ms
+            cv2.fastNlMeansDenoising(image, image, h=17, templateWindowSize=1, searchWindowSize=2)
+        image = self._handle_orientated_image(image)
+        return image
+
+    def _screenshot_capture_interval(self):
         self._screenshot_interval.wait()
         self._screenshot_interval.reset()
+        return self._screenshot_capture()
 
-        for _ in range(2):
-            if self.screenshot_method_override:
-                method = self.screenshot_method_override
-            else:
-                method = self.config.Emulator_ScreenshotMethod
-            method = self.screenshot_methods.get(method, self.screenshot_adb)
+    @cached_property
+    def screenshot_prefetch(self) -> ScreenshotPrefetch:
+        return ScreenshotPrefetch(capture=self._screenshot_capture_interval)
 
-            self.image = method()
+    def screenshot_prefetch_invalidate(self):
+        """
+        Drop prefetched screenshots, call this after device controls.
+        """
+        if has_cached_property(self, 'screenshot_prefetch'):
+            self.screenshot_prefetch.invalidate()
 
-            if self.config.Emulator_ScreenshotDedithering:
-                # This will take 40-60ms
-                cv2.fastNlMeansDenoising(self.image, self.image, h=17, templateWindowSize=1, searchWindowSize=2)
-            self.image = self._handle_orientated_image(self.image)
+    def screenshot(self):
+        """
+        Returns:
+            np.ndarray:
+        """
+        prefetch = self.config.SCREENSHOT_PREFETCH
+        if not prefetch:
+            self._screenshot_interval.wait()
+            self._screenshot_interval.reset()
+
+        for _ in range(2):
+            with profiler.measure('screenshot', 'capture'):
+                if prefetch:
+                    # Accept frames captured within one interval, which is what a synchronous screenshot waits for
+                    frame = self.screenshot_prefetch.get(max_age=self._screenshot_interval.limit)
+                    self.frame_timestamp = frame.start
+                    image = frame.image
+                else:
+                    self.frame_timestamp = time.time()
+                    image = self._screenshot_capture()
+
+            if self.config.SCREENSHOT_CHANGE_DETECTION and not self._frame_change_check(image):
+                # Keep frame_id, so detection results on the previous frame are reused
+                self.frame_changed = False
+                self._image = image
+            else:
+                self.frame_changed = True
+                self.image = image
 
             if self.config.Error_SaveError:
                 self.screenshot_deque.append({'time': datetime.now(), 'image': self.image})
@@ -83,10 +161,35 @@ class Screenshot(Adb, WSA, DroidCast, AScreenCap, Scrcpy, NemuIpc, LDOpenGL):
             if self.check_screen_size() and self.check_screen_black():
                 break
             else:
+                # Checks may have changed device states, don't reuse frames captured before
+                self.screenshot_prefetch_invalidate()
                 continue
 
         return self.image
 
+    def _frame_change_check(self, image):
+        """
+        Compare new screenshot with the previous one.
+        Long combat animations, loading screens and idle waits give identical frames,
+        handlers don't need to run detection on them again.
+
+        Args:
+            image (np.ndarray):
+
+        Returns:
+            bool: If image changed.
+        """
+        prev = self._frame_prev
+        self._frame_prev = image
+        if prev is None or prev.shape != image.shape:
+            return True
+        # Compare a downsampled view first, changed frames usually differ everywhere
+        threshold = self.config.SCREENSHOT_CHANGE_THRESHOLD
+        if np.max(cv2.absdiff(image[::16, ::16], prev[::16, ::16])) > threshold:
+            return True
+        # Time cost to compare two 1280x720 images is about 0.5ms
+        return cv2.norm(image, prev, cv2.NORM_INF) > threshold
+
     @property
     def has_cached_image(self):
         return hasattr(self, 'image') and self.image is not None
@@ -99,7 +202,7 @@ class Screenshot(Adb, WSA, DroidCast, AScreenCap, Scrcpy, NemuIpc, LDOpenGL):
         Returns:
             np.ndarray:
         """
-        width, height = image_size(self.image)
+        width, height = image_size(image)
         if width == 1280 and height == 720:
             return image
 
@@ -126,7 +229,7 @@ class Screenshot(Adb, WSA, DroidCast, AScreenCap, Scrcpy, NemuIpc, LDOpenGL):
             raise RequestHumanTakeover
         # Limit in 1~400
         length = max(1, min(length, 400))
-        return deque(maxlen=length)
+        return ScreenshotBuffer(maxlen=length, max_bytes=self.config.SCREENSHOT_BUFFER_MAX_BYTES)
 
     def save_screenshot(self, genre='items', interval=None, to_base_folder=False):
         """Save a screenshot. Use millisecond timestamp as file name.
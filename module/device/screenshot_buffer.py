@@ -0,0 +1,192 @@
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from module.logger import logger
+
+
+class _Frame:
+    __slots__ = ('time', 'shape', 'key', 'payload', 'refs', 'evicted')
+
+    def __init__(self, time, shape, key, payload):
+        """
+        Args:
+            time (datetime.datetime):
+            shape (tuple[int]): Shape of image
+            key (_Frame): Keyframe that this frame is a delta against, or None if this is a keyframe
+            payload (bytes): lz4 compressed image or delta
+        """
+        self.time = time
+        self.shape = shape
+        self.key = key
+        self.payload = payload
+        # Number of frames referencing this keyframe
+        self.refs = 0
+        # Keyframe removed from buffer but still referenced
+        self.evicted = False
+
+
+class ScreenshotBuffer:
+    """
+    A ring buffer of screenshots to be saved in error logs, limited by frame count and bytes.
+
+    Raw screenshots are compressed by a background thread, most of them are stored as
+    lz4 compressed deltas against a keyframe, which are tiny when game is not animating.
+    Frames are decoded only when iterated.
+
+    Examples:
+        buffer = ScreenshotBuffer(maxlen=60, max_bytes=256 * 1024 * 1024)
+        buffer.append({'time': datetime.now(), 'image': image})
+        for data in buffer:
+            save_image(data['image'], f'{data["time"]}.png')
+    """
+    # Create a new keyframe every N frames
+    KEYFRAME_INTERVAL = 10
+    # Create a new keyframe if delta is larger than this ratio of the keyframe, usually a scene change
+    KEYFRAME_RATIO = 0.6
+    # Max raw frames waiting to be compressed, older ones are dropped if compression can't catch up
+    PENDING_LENGTH = 4
+
+    def __init__(self, maxlen, max_bytes):
+        """
+        Args:
+            maxlen (int): Max number of frames.
+            max_bytes (int): Max bytes of compressed frames.
+        """
+        self.maxlen = maxlen
+        self.max_bytes = max_bytes
+        self.frames = deque()
+        self.bytes = 0
+        self.pending = deque(maxlen=self.PENDING_LENGTH)
+        self.lock = threading.Condition()
+        self.busy = False
+        self.thread = None
+        # Worker states
+        self._key = None
+        self._key_image = None
+        self._key_count = 0
+
+    def __len__(self):
+        with self.lock:
+            return len(self.frames) + len(self.pending)
+
+    def append(self, data):
+        """
+        Args:
+            data (dict): {'time': datetime.datetime, 'image': np.ndarray}
+        """
+        with self.lock:
+            self.pending.append((data['time'], data['image']))
+            self.lock.notify_all()
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._worker, daemon=True, name='ScreenshotBuffer')
+                self.thread.start()
+
+    def clear(self):
+        with self.lock:
+            self.pending.clear()
+            self.frames.clear()
+            self.bytes = 0
+            self._key = None
+            self._key_image = None
+
+    def _worker(self):
+        while 1:
+            with self.lock:
+                while not self.pending:
+                    self.busy = False
+                    self.lock.notify_all()
+                    self.lock.wait()
+                self.busy = True
+                frame_time, image = self.pending.popleft()
+            try:
+                self._encode(frame_time, image)
+            except Exception as e:
+                logger.warning(f'Failed to compress screenshot: {e}')
+
+    def _encode(self, frame_time, image):
+        from lz4.block import compress
+        image = np.ascontiguousarray(image)
+        key = self._key
+        frame = None
+        if key is not None and not key.evicted and key.shape == image.shape \
+                and self._key_count < self.KEYFRAME_INTERVAL:
+            # uint8 subtraction wraps around, so it can be reverted by an uint8 addition
+            delta = np.subtract(image, self._key_image, dtype=np.uint8)
+            payload = compress(delta.tobytes())
+            if len(payload) < len(key.payload) * self.KEYFRAME_RATIO:
+                frame = _Frame(frame_time, image.shape, key, payload)
+                self._key_count += 1
+        if frame is None:
+            frame = _Frame(frame_time, image.shape, None, compress(image.tobytes()))
+            self._key = frame
+            self._key_image = image
+            self._key_count = 1
+
+        with self.lock:
+            if frame.key is not None:
+                frame.key.refs += 1
+            self.frames.append(frame)
+            self.bytes += len(frame.payload)
+            while len(self.frames) > self.maxlen or (self.bytes > self.max_bytes and len(self.frames) > 1):
+                self._evict()
+
+    def _evict(self):
+        frame = self.frames.popleft()
+        if frame.key is None:
+            if frame.refs > 0:
+                # Still referenced by deltas, keep its bytes counted until they are gone
+                frame.evicted = True
+            else:
+                self.bytes -= len(frame.payload)
+        else:
+            self.bytes -= len(frame.payload)
+            key = frame.key
+            key.refs -= 1
+            if key.evicted and key.refs <= 0:
+                self.bytes -= len(key.payload)
+
+    def flush(self, timeout=5):
+        """
+        Wait until all pending frames are compressed.
+
+        Returns:
+            bool: If success.
+        """
+        end = time.time() + timeout
+        with self.lock:
+            while self.pending or self.busy:
+                remain = end - time.time()
+                if remain <= 0:
+                    logger.warning('ScreenshotBuffer flush timeout')
+                    return False
+                self.lock.wait(timeout=remain)
+        return True
+
+    @staticmethod
+    def _decode(frame):
+        from lz4.block import decompress
+        return np.frombuffer(decompress(frame.payload), dtype=np.uint8).reshape(frame.shape)
+
+    def __iter__(self):
+        """
+        Yields:
+            dict: {'time': datetime.datetime, 'image': np.ndarray}, in time order
+        """
+        self.flush()
+        with self.lock:
+            frames = list(self.frames)
+
+        key = None
+        key_image = None
+        for frame in frames:
+            if frame.key is None:
+                image = self._decode(frame).copy()
+            else:
+                if frame.key is not key:
+                    key = frame.key
+                    key_image = self._decode(key)
+                image = np.add(self._decode(frame), key_image, dtype=np.uint8)
+            yield {'time': frame.time, 'image': image}
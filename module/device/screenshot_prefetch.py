@@ -0,0 +1,116 @@
+import threading
+import time
+
+from module.logger import logger
+
+
+class PrefetchFrame:
+    __slots__ = ('start', 'end', 'image')
+
+    def __init__(self, start, end, image):
+        """
+        Args:
+            start (float): Timestamp when capture started
+            end (float): Timestamp when capture finished
+            image (np.ndarray):
+        """
+        self.start = start
+        self.end = end
+        self.image = image
+
+
+class ScreenshotPrefetch:
+    """
+    Capture the next screenshot at background while the current one is being analysed.
+
+    There are two slots, one frame in flight in the capture thread and one completed frame.
+    Once a completed frame is taken, capture of the next one starts immediately.
+    Capture thread stops after one frame if nobody takes it, so it's idle during waits.
+
+    Frames captured before the latest `invalidate()` are dropped,
+    device controls should call it after they are done.
+    """
+
+    def __init__(self, capture):
+        """
+        Args:
+            capture (callable): Function that takes a screenshot and returns np.ndarray.
+                It will be called in the capture thread.
+        """
+        self.capture = capture
+        self.cond = threading.Condition()
+        self.frame: PrefetchFrame = None
+        self.error: Exception = None
+        self.want = False
+        self.barrier = 0.
+        self.thread: threading.Thread = None
+
+    def start(self):
+        with self.cond:
+            if self.thread is not None and self.thread.is_alive():
+                return
+            logger.info('Screenshot prefetch start')
+            self.thread = threading.Thread(target=self._worker, daemon=True, name='ScreenshotPrefetch')
+            self.thread.start()
+
+    def invalidate(self):
+        """
+        Drop frames that started before now, call this after device controls.
+        """
+        with self.cond:
+            self.barrier = time.time()
+            self.frame = None
+
+    def _worker(self):
+        while 1:
+            with self.cond:
+                while not self.want:
+                    self.cond.wait()
+                self.want = False
+
+            start = time.time()
+            try:
+                image = self.capture()
+            except Exception as e:
+                with self.cond:
+                    self.error = e
+                    self.cond.notify_all()
+                continue
+
+            with self.cond:
+                self.frame = PrefetchFrame(start=start, end=time.time(), image=image)
+                self.cond.notify_all()
+
+    def get(self, max_age=0.):
+        """
+        Get the freshest completed frame, and start to capture the next one.
+
+        Args:
+            max_age (float): Accept frames that started at most `max_age` seconds before now.
+
+        Returns:
+            PrefetchFrame:
+
+        Raises:
+            Exception: Any exception raised in capture
+        """
+        self.start()
+        min_start = time.time() - max_age
+        with self.cond:
+            while 1:
+                if self.error is not None:
+                    error, self.error = self.error, None
+                    raise error
+                frame = self.frame
+                if frame is not None and frame.start > self.barrier and frame.start >= min_start:
+                    self.frame = None
+                    self.want = True
+                    self.cond.notify_all()
+                    return frame
+
+                self.want = True
+                self.cond.notify_all()
+                self.cond.wait(timeout=1)
+                if not self.thread.is_alive():
+                    self.thread = None
+                    self.start()
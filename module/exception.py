@@ -31,6 +31,11 @@ class ScriptEnd(Exception):
     pass
 
 
+class ReplayEnd(Exception):
+    # No more recorded screenshots to serve, see module.device.replay
+    pass
+
+
 class GameStuckError(Exception):
     pass
 
@@ -12,7 +12,7 @@ import time
 import zipfile
 from logging.handlers import TimedRotatingFileHandler
 from pathlib import Path
-from typing import Callable, List
+from typing import Callable, List, NamedTuple
 
 from rich.console import Console, ConsoleOptions, ConsoleRenderable, NewLine
 from rich.highlighter import NullHighlighter, RegexHighlighter
@@ -44,17 +44,49 @@ class RichFileHandler(RichHandler):
     pass
 
 
+class WebLogRecord(NamedTuple):
+    """
+    A log line sent from Alas instances to GUI.
+    It contains plain values only, which is much cheaper to pickle than a rendered log table,
+    and it's rendered by rich only when GUI prints it to a connected client.
+    """
+    levelno: int
+    levelname: str
+    created: float
+    message: str
+
+    def __rich__(self) -> ConsoleRenderable:
+        hdlr = _get_web_record_handler()
+        record = logging.makeLogRecord({
+            'levelno': self.levelno,
+            'levelname': self.levelname,
+            'created': self.created,
+            'msg': self.message,
+        })
+        message_renderable = hdlr.render_message(record, self.message)
+        return hdlr.render(record=record, traceback=None, message_renderable=message_renderable)
+
+
 class RichRenderableHandler(RichHandler):
     """
     Pass renderable into a function
     """
 
-    def __init__(self, *args, func: Callable[[ConsoleRenderable], None] = None, **kwargs):
+    def __init__(self, *args, func: Callable[[ConsoleRenderable], None] = None, structured=False, **kwargs):
+        """
+        Args:
+            func: Function to receive renderables.
+            structured (bool): True to pass WebLogRecord instead of renderable for log lines without traceback.
+        """
         super().__init__(*args, **kwargs)
         self._func = func
+        self._structured = structured
 
     def emit(self, record: logging.LogRecord) -> None:
         message = self.format(record)
+        if self._structured and not record.exc_info:
+            self._func(WebLogRecord(record.levelno, record.levelname, record.created, message))
+            return
         traceback = None
         if (
                 self.rich_tracebacks
@@ -447,7 +479,7 @@ def set_file_logger(name=pyw_name):
 
 
 
-def set_func_logger(func):
+def _new_web_handler(func=None, structured=False):
     console = HTMLConsole(
         force_terminal=False,
         force_interactive=False,
@@ -460,6 +492,7 @@ def set_func_logger(func):
     )
     hdlr = RichRenderableHandler(
         func=func,
+        structured=structured,
         console=console,
         show_path=False,
         show_time=False,
@@ -470,6 +503,30 @@ def set_func_logger(func):
         highlighter=Highlighter(),
     )
     hdlr.setFormatter(web_formatter)
+    return hdlr
+
+
+_web_record_handler = None
+
+
+def _get_web_record_handler():
+    """
+    Returns:
+        RichRenderableHandler: Handler to render WebLogRecord in GUI, not added to logger.
+    """
+    global _web_record_handler
+    if _web_record_handler is None:
+        _web_record_handler = _new_web_handler()
+    return _web_record_handler
+
+
+def set_func_logger(func, structured=False):
+    """
+    Args:
+        func: Function to receive log renderables.
+        structured (bool): True to send WebLogRecord for log lines, see WebLogRecord.
+    """
+    hdlr = _new_web_handler(func=func, structured=structured)
     logger.handlers = [h for h in logger.handlers if not isinstance(
         h, RichRenderableHandler)]
     logger.addHandler(hdlr)
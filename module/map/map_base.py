@@ -1,12 +1,33 @@
 import copy
+from functools import lru_cache
 
 from module.base.utils import location2node, node2location
 from module.logger import logger
+from module.map.map_columns import GridColumns
+from module.map.map_graph import MapGraph
 from module.map.map_grids import SelectedGrids
 from module.map.utils import *
 from module.map_detection.grid_info import GridInfo
 
 
+@lru_cache(maxsize=256)
+def compile_map_text(text):
+    """
+    Args:
+        text (str): map_data, weight_data, etc.
+
+    Returns:
+        tuple[tuple[tuple[int, int], str]]: ((location, data), ...)
+    """
+    result = []
+    text = text.strip()
+    for y, row in enumerate(text.split('\n')):
+        row = row.strip()
+        for x, data in enumerate(row.split(' ')):
+            result.append(((x, y), data))
+    return tuple(result)
+
+
 class CampaignMap:
     def __init__(self, name=None):
         self.name = name
@@ -35,6 +56,17 @@ class CampaignMap:
         self.poor_map_data = False
         self.camera_sight = (-3, -1, 3, 2)
         self.grid_connection = {}
+        # Cost of each grid from the last `find_path_initial()`, in `graph.locations` order
+        self.path_cost = None
+        # MapGraph built from grid_connection, see `graph`
+        self._graph = None
+        # Key: int, fleet index. Value: np.ndarray, cost of each grid in `graph.locations` order
+        self.fleet_cost = {}
+        # Attribute columns of grids for `select()`, see `columns`
+        self._columns = None
+        # Key: (wall, portal). Value: [grid_connection, MapGraph or None], see `grid_connection_initial()`
+        self._connection_cache = {}
+        self._connection_key = None
 
     def __iter__(self):
         return iter(self.grids.values())
@@ -54,11 +86,17 @@ class CampaignMap:
 
     @staticmethod
     def _parse_text(text):
-        text = text.strip()
-        for y, row in enumerate(text.split('\n')):
-            row = row.strip()
-            for x, data in enumerate(row.split(' ')):
-                yield (x, y), data
+        yield from compile_map_text(text)
+
+    @property
+    def columns(self):
+        """
+        Returns:
+            GridColumns:
+        """
+        if self._columns is None or self._columns.size != len(self.grids):
+            self._columns = GridColumns(list(self.grids.values()))
+        return self._columns
 
     @property
     def shape(self):
@@ -72,6 +110,8 @@ class CampaignMap:
                 grid = self.grid_class()
                 grid.location = (x, y)
                 self.grids[(x, y)] = grid
+        self._columns = None
+        self._connection_cache = {}
 
         # camera_data can be generate automatically, but it's better to set it manually.
         self.camera_data = [location2node(loca) for loca in camera_2d((0, 0, *self._shape), sight=self.camera_sight)]
@@ -125,6 +165,7 @@ class CampaignMap:
     @wall_data.setter
     def wall_data(self, text):
         self._wall_data = text
+        self._connection_cache = {}
 
     @property
     def portal_data(self):
@@ -140,6 +181,7 @@ class CampaignMap:
             node1, node2 = location_ensure(nodes[0]), location_ensure(nodes[1])
             self._portal_data.append((node1, node2))
             self[node1].is_portal = True
+        self._connection_cache = {}
 
     @property
     def land_based_data(self):
@@ -256,19 +298,49 @@ class CampaignMap:
             bool: If used wall data.
         """
         logger.info(f'grid_connection: wall={wall}, portal={portal}')
+        wall = bool(wall and self._wall_data)
+        portal = bool(portal)
+        key = (wall, portal)
+        if key not in self._connection_cache:
+            self._connection_cache[key] = [self._compile_grid_connection(wall=wall, portal=portal), None]
+        self.grid_connection, self._graph = self._connection_cache[key]
+        self._connection_key = key
+
+        # Create portal link
+        for start, end in self._portal_data:
+            if portal:
+                self[start].is_portal = True
+                self[start].portal_link = end
+            else:
+                self[start].is_portal = False
+                self[start].portal_link = None
 
-        # Generate grid connection.
+        return True
+
+    def _compile_grid_connection(self, wall=False, portal=False):
+        """
+        Generate grid connection.
+        Result is cached in `grid_connection_initial()` and shared, it should not be modified.
+
+        Args:
+            wall (bool): If use wall_data
+            portal (bool): If use portal_data
+
+        Returns:
+            dict: Key: grid location. Value: set of connected grid locations.
+        """
+        grid_connection = {}
         total = set([grid for grid in self.grids.keys()])
         for grid in self:
             connection = set()
-            for arr in np.array([(0, -1), (0, 1), (-1, 0), (1, 0)]):
-                arr = tuple(arr + grid.location)
+            for arr in [(0, -1), (0, 1), (-1, 0), (1, 0)]:
+                arr = (grid.location[0] + arr[0], grid.location[1] + arr[1])
                 if arr in total:
                     connection.add(arr)
-            self.grid_connection[grid.location] = connection
+            grid_connection[grid.location] = connection
 
         # Use wall_data to delete connection.
-        if wall and self._wall_data:
+        if wall:
             wall = []
             for y, line in enumerate([l for l in self._wall_data.split('\n') if l]):
                 for x, letter in enumerate(line[4:-2]):
@@ -285,22 +357,30 @@ class CampaignMap:
             for g1, g2 in disconnect:
                 g1 = tuple(g1.tolist())
                 g2 = tuple(g2.tolist())
-                self.grid_connection[g1].remove(g2)
-                self.grid_connection[g2].remove(g1)
+                grid_connection[g1].remove(g2)
+                grid_connection[g2].remove(g1)
 
         # Create portal link
         for start, end in self._portal_data:
             if portal:
-                self.grid_connection[start].add(end)
-                self[start].is_portal = True
-                self[start].portal_link = end
+                grid_connection[start].add(end)
             else:
-                if end in self.grid_connection[start]:
-                    self.grid_connection[start].remove(end)
-                self[start].is_portal = False
-                self[start].portal_link = None
+                if end in grid_connection[start]:
+                    grid_connection[start].remove(end)
 
-        return True
+        return grid_connection
+
+    @property
+    def graph(self):
+        """
+        Returns:
+            MapGraph:
+        """
+        if self._graph is None or self._graph.size != len(self.grid_connection):
+            self._graph = MapGraph(self.grid_connection)
+            if self._connection_key in self._connection_cache:
+                self._connection_cache[self._connection_key][1] = self._graph
+        return self._graph
 
     def fixup_submarine_fleet(self):
         # fixup submarine spawn point
@@ -540,35 +620,19 @@ class CampaignMap:
         """
         location = location_ensure(location)
         ambush_cost = 10 if has_ambush else 1
-        for grid in self:
-            grid.cost = 9999
-            grid.connection = None
-        start = self[location]
-        start.cost = 0
-        visited = [start]
-        visited = set(visited)
-
-        while 1:
-            new = visited.copy()
-            for grid in visited:
-                for arr in self.grid_connection[grid.location]:
-                    arr = self[arr]
-                    if arr.is_land or arr.is_mechanism_block:
-                        continue
-                    cost = ambush_cost if arr.may_ambush else 1
-                    cost += grid.cost
-
-                    if cost < arr.cost:
-                        arr.cost = cost
-                        arr.connection = grid.location
-                    elif cost == arr.cost:
-                        if abs(arr.location[0] - grid.location[0]) == 1:
-                            arr.connection = grid.location
-                    if arr.is_sea or not has_enemy:
-                        new.add(arr)
-            if len(new) == len(visited):
-                break
-            visited = new
+        graph = self.graph
+        grids = [self[loca] for loca in graph.locations]
+        weight = np.array([
+            -1 if grid.is_land or grid.is_mechanism_block else (ambush_cost if grid.may_ambush else 1)
+            for grid in grids
+        ], dtype=np.int64)
+        expandable = np.array([bool(grid.is_sea or not has_enemy) for grid in grids], dtype=bool)
+        cost, prev = graph.dijkstra(graph.index[location], weight=weight, expandable=expandable)
+
+        for grid, c, p in zip(grids, cost.tolist(), prev.tolist()):
+            grid.cost = c
+            grid.connection = graph.locations[p] if p >= 0 else None
+        self.path_cost = cost
 
         # self.show_cost()
         # self.show_connection()
@@ -585,6 +649,8 @@ class CampaignMap:
             if location == ():
                 continue
             self.find_path_initial(location, has_ambush=has_ambush)
+            self.fleet_cost[fleet] = self.path_cost
+            # Also set as grid attribute, so grids can be selected and sorted by `cost_{fleet}`
             attr = f'cost_{fleet}'
             for grid in self:
                 grid.__setattr__(attr, grid.cost)
@@ -803,16 +869,9 @@ class CampaignMap:
         Returns:
             SelectedGrids:
         """
-        result = []
-        for grid in self:
-            flag = True
-            for k, v in kwargs.items():
-                if grid.__getattribute__(k) != v:
-                    flag = False
-            if flag:
-                result.append(grid)
-
-        return SelectedGrids(result)
+        columns = self.columns
+        rows = columns.select(kwargs)
+        return SelectedGrids([columns.grids[row] for row in rows], columns=columns, rows=rows)
 
     def to_selected(self, grids):
         """
@@ -0,0 +1,173 @@
+import numpy as np
+
+
+class GridColumns:
+    """
+    Columnar storage of grid attributes in a campaign map, for vectorized `select()`.
+
+    A column is created on the first query of an attribute, then kept up to date by `GridInfo.__setattr__`,
+    which calls `on_set()` on every attribute write of a bound grid,
+    including those in `GridInfo.merge()`, `reset()`, `wipe_out()` and the ones set by strategies.
+    Only plain class attributes with scalar values are stored,
+    properties like `is_sea` and non-scalar queries fall back to a linear scan.
+
+    Examples:
+        columns = GridColumns(list(campaign_map.grids.values()))
+        rows = columns.select({'is_enemy': True, 'enemy_scale': 3})
+        grids = [columns.grids[row] for row in rows]
+    """
+    SCALAR = (bool, int, float, str, type(None))
+
+    def __init__(self, grids):
+        """
+        Args:
+            grids (list[GridInfo]): Grids of a map, rows of columns are in the same order.
+        """
+        self.grids = grids
+        self.size = len(grids)
+        self.index = {grid.location: row for row, grid in enumerate(grids)}
+        self.columns = {}
+        # Key: attribute name. Value: python type of all values in column, None for mixed types.
+        self.types = {}
+        classes = set(type(grid) for grid in grids)
+        self.grid_class = classes.pop() if len(classes) == 1 else None
+        self._columnable = {}
+        for grid in grids:
+            object.__setattr__(grid, '_columns', self)
+
+    def columnable(self, attr):
+        """
+        Args:
+            attr (str):
+
+        Returns:
+            bool: If attribute can be stored as a column.
+        """
+        try:
+            return self._columnable[attr]
+        except KeyError:
+            pass
+        if self.grid_class is None or attr.startswith('_'):
+            result = False
+        else:
+            value = getattr(self.grid_class, attr, None)
+            result = attr in dir(self.grid_class) and isinstance(value, self.SCALAR)
+        self._columnable[attr] = result
+        return result
+
+    @staticmethod
+    def _dtype(values):
+        """
+        Returns:
+            type, type: Python type and numpy dtype of values.
+        """
+        for t, dtype in [(bool, bool), (int, np.int64), (float, np.float64)]:
+            if all(type(v) is t for v in values):
+                return t, dtype
+        return None, object
+
+    def column(self, attr):
+        """
+        Args:
+            attr (str):
+
+        Returns:
+            np.ndarray: Values of attribute in all grids.
+        """
+        try:
+            return self.columns[attr]
+        except KeyError:
+            pass
+        values = [getattr(grid, attr) for grid in self.grids]
+        t, dtype = self._dtype(values)
+        column = np.empty(self.size, dtype=dtype)
+        column[:] = values
+        self.columns[attr] = column
+        self.types[attr] = t
+        return column
+
+    def on_set(self, grid, attr, value):
+        """
+        Called by `GridInfo.__setattr__`.
+
+        Args:
+            grid (GridInfo):
+            attr (str):
+            value:
+        """
+        column = self.columns.get(attr)
+        if column is None:
+            return
+        row = self.index.get(grid.location)
+        # Grids copied from a bound grid, such as the ones in `CampaignMap.update()`, are not tracked
+        if row is None or self.grids[row] is not grid:
+            return
+        t = self.types[attr]
+        if t is None or type(value) is t:
+            column[row] = value
+        else:
+            # Type changed, column will be rebuilt on next query
+            del self.columns[attr]
+            del self.types[attr]
+
+    def _mask(self, attr, value, strict):
+        """
+        Args:
+            attr (str):
+            value: Scalar.
+            strict (bool): True to match type as well, like `SelectedGrids.select()`.
+                False to match with `!=` only, like `CampaignMap.select()`.
+
+        Returns:
+            np.ndarray: bool
+        """
+        column = self.column(attr)
+        t = self.types[attr]
+        if t is None:
+            if strict:
+                return np.fromiter(
+                    (type(v) == type(value) and not v != value for v in column), dtype=bool, count=self.size)
+            else:
+                return np.fromiter((not v != value for v in column), dtype=bool, count=self.size)
+        if strict:
+            if type(value) is not t:
+                return np.zeros(self.size, dtype=bool)
+        elif not isinstance(value, (bool, int, float)):
+            # Numbers never equal to str or None
+            return np.zeros(self.size, dtype=bool)
+        return column == value
+
+    def select(self, kwargs, rows=None, strict=False):
+        """
+        Args:
+            kwargs (dict): Attributes of Grid.
+            rows (np.ndarray): Rows to select from, None for all.
+            strict (bool): See `_mask()`.
+
+        Returns:
+            np.ndarray: Selected rows in ascending order.
+        """
+        mask = np.ones(self.size, dtype=bool)
+        if rows is not None:
+            mask[:] = False
+            mask[rows] = True
+        remain = {}
+        for k, v in kwargs.items():
+            if isinstance(v, self.SCALAR) and self.columnable(k):
+                mask &= self._mask(k, v, strict=strict)
+            else:
+                remain[k] = v
+
+        rows = np.flatnonzero(mask)
+        if remain:
+            def matched(grid):
+                for k, v in remain.items():
+                    obj_v = grid.__getattribute__(k)
+                    if strict and type(obj_v) != type(v):
+                        return False
+                    if obj_v != v:
+                        return False
+                return True
+
+            rows = np.array([row for row in rows if matched(self.grids[row])], dtype=np.int64)
+        return rows
@@ -0,0 +1,89 @@
+import heapq
+
+import numpy as np
+
+COST_UNREACHABLE = 9999
+
+
+class MapGraph:
+    """
+    Grid connections of a campaign map in CSR format.
+
+    Examples:
+        graph = MapGraph(grid_connection)
+        cost, prev = graph.dijkstra(graph.index[(2, 2)], weight, expandable)
+    """
+
+    def __init__(self, grid_connection):
+        """
+        Args:
+            grid_connection (dict): Key: grid location. Value: set of connected grid locations.
+        """
+        self.locations = sorted(grid_connection.keys(), key=lambda loca: (loca[1], loca[0]))
+        self.index = {loca: i for i, loca in enumerate(self.locations)}
+        indptr = [0]
+        indices = []
+        for loca in self.locations:
+            for arr in sorted(grid_connection[loca], key=lambda loca: (loca[1], loca[0])):
+                if arr in self.index:
+                    indices.append(self.index[arr])
+            indptr.append(len(indices))
+        self.indptr = np.array(indptr, dtype=np.int32)
+        self.indices = np.array(indices, dtype=np.int32)
+        self.size = len(self.locations)
+
+        # If an edge connects two horizontally adjacent grids
+        location = np.array(self.locations, dtype=np.int32).reshape((-1, 2))
+        source = np.repeat(np.arange(self.size), np.diff(self.indptr))
+        self.horizontal = np.abs(location[source, 0] - location[self.indices, 0]) == 1 if self.size else \
+            np.zeros(0, dtype=bool)
+
+    def dijkstra(self, source, weight, expandable):
+        """
+        Single source shortest path, where entering a grid costs its weight.
+
+        Args:
+            source (int): Index of source grid.
+            weight (np.ndarray): Cost to enter each grid, negative for grids that can't be entered.
+            expandable (np.ndarray): bool, if fleet can walk through each grid.
+                Grids not expandable can be reached but path can't continue from it.
+                Source grid is always expandable.
+
+        Returns:
+            np.ndarray, np.ndarray: Cost of each grid, COST_UNREACHABLE if unreachable.
+                And the index of previous grid on path, -1 for none.
+                When two paths have the same cost, the one comes horizontally is preferred.
+        """
+        # Python lists are faster than numpy indexing on such small arrays
+        indptr = self.indptr.tolist()
+        indices = self.indices.tolist()
+        horizontal = self.horizontal.tolist()
+        weight = weight.tolist()
+        expandable = expandable.tolist()
+        cost_list = [COST_UNREACHABLE] * self.size
+        prev_list = [-1] * self.size
+        done = [False] * self.size
+
+        cost_list[source] = 0
+        queue = [(0, source)]
+        while queue:
+            c, node = heapq.heappop(queue)
+            if done[node]:
+                continue
+            done[node] = True
+            if node != source and not expandable[node]:
+                continue
+            for edge in range(indptr[node], indptr[node + 1]):
+                arr = indices[edge]
+                w = weight[arr]
+                if w < 0:
+                    continue
+                new = c + w
+                if new < cost_list[arr]:
+                    cost_list[arr] = new
+                    prev_list[arr] = node
+                    heapq.heappush(queue, (new, arr))
+                elif new == cost_list[arr] and horizontal[edge]:
+                    prev_list[arr] = node
+
+        return np.array(cost_list, dtype=np.int64), np.array(prev_list, dtype=np.int64)
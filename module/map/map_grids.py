@@ -3,9 +3,17 @@ import typing as t
 
 
 class SelectedGrids:
-    def __init__(self, grids):
+    def __init__(self, grids, columns=None, rows=None):
+        """
+        Args:
+            grids (list):
+            columns (GridColumns): Columns of the map that grids belong to, if grids are selected from a map.
+            rows (np.ndarray): Rows of grids in columns.
+        """
         self.grids = grids
         self.indexes: t.Dict[tuple, SelectedGrids] = {}
+        self.columns = columns
+        self.rows = rows
 
     def __iter__(self):
         return iter(self.grids)
@@ -72,6 +80,10 @@ class SelectedGrids:
         Returns:
             SelectedGrids:
         """
+        if self.columns is not None:
+            rows = self.columns.select(kwargs, rows=self.rows, strict=True)
+            return SelectedGrids([self.columns.grids[row] for row in rows], columns=self.columns, rows=rows)
+
         def matched(obj):
             flag = True
             for k, v in kwargs.items():
@@ -41,6 +41,14 @@ class MapDetector:
         else:
             self.backend = Perspective(config=self.config)
 
+    def detector_track_swipe(self, vector):
+        """
+        Args:
+            vector (tuple, np.ndarray): Camera movement in grids, float.
+        """
+        if hasattr(self.backend, 'track_swipe'):
+            self.backend.track_swipe(vector)
+
     def load(self, image):
         """
         Args:
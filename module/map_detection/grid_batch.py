@@ -0,0 +1,216 @@
+import cv2
+import numpy as np
+
+from module.base.utils import color_similarity_2d, rgb2gray
+from module.map_detection.grid_predictor import GridPredictor
+from module.template.assets import *
+
+
+def stack_color_similarity(images, color):
+    """
+    `color_similarity_2d()` on a stack of images in one call.
+
+    Args:
+        images (np.ndarray): Shape (n, height, width, 3)
+        color (tuple): (r, g, b)
+
+    Returns:
+        np.ndarray: Shape (n, height, width), uint8
+    """
+    n, h, w = images.shape[:3]
+    mask = color_similarity_2d(images.reshape((n * h, w, 3)), color=color)
+    return mask.reshape((n, h, w))
+
+
+def stack_count(masks, lower=1, upper=255):
+    """
+    Args:
+        masks (np.ndarray): Shape (n, height, width)
+        lower (int):
+        upper (int):
+
+    Returns:
+        np.ndarray: Shape (n,), number of pixels in range of each image
+    """
+    return np.count_nonzero((masks >= lower) & (masks <= upper), axis=(1, 2))
+
+
+def stack_hsv_count(images, h=(0, 360), s=(0, 100), v=(0, 100)):
+    """
+    `GridPredictor.relative_hsv_count()` on a stack of images in one call.
+
+    Args:
+        images (np.ndarray): Shape (n, height, width, 3)
+        h (tuple): Hue.
+        s (tuple): Saturation.
+        v (tuple): Value.
+
+    Returns:
+        np.ndarray: Shape (n,)
+    """
+    n, height, width = images.shape[:3]
+    image = cv2.cvtColor(images.reshape((n * height, width, 3)), cv2.COLOR_RGB2HSV)
+    lower = (h[0] / 2, s[0] * 2.55, v[0] * 2.55)
+    upper = (h[1] / 2 + 1, s[1] * 2.55 + 1, v[1] * 2.55 + 1)
+    mask = cv2.inRange(image, lower, upper)
+    return np.count_nonzero(mask.reshape((n, -1)), axis=1)
+
+
+def stack_match(template, images, similarity=0.85):
+    """
+    `Template.match()` on a stack of images in one `cv2.matchTemplate` call.
+    Images are concatenated vertically, and only the results fully inside each image are used,
+    so they are the same as matching one by one.
+
+    Args:
+        template (Template):
+        images (np.ndarray): Shape (n, height, width)
+        similarity (float): 0 to 1.
+
+    Returns:
+        np.ndarray: Shape (n,), bool
+    """
+    n, h, w = images.shape[:3]
+    if template.is_gif:
+        return np.array([template.match(image, similarity=similarity) for image in images], dtype=bool)
+
+    t_h, t_w = template.image.shape[:2]
+    res = cv2.matchTemplate(images.reshape((n * h, w)), template.image, cv2.TM_CCOEFF_NORMED)
+    # Pad to n * h rows, then drop the rows crossing image boundaries
+    res = np.concatenate([res, np.full((t_h - 1, res.shape[1]), -1, dtype=res.dtype)])
+    res = res.reshape((n, h, -1))[:, :h - t_h + 1, :]
+    res = np.nan_to_num(res, nan=-1)
+    return res.max(axis=(1, 2)) > similarity
+
+
+class GridBatchPredictor:
+    """
+    Run the common tests in `GridPredictor.predict()` of all grids together.
+
+    Crops of each test are stacked, color masks and template matching are done on the whole stack.
+    Results are stored in `GridPredictor.batch_result`, and used by the `predict_*` methods of each grid,
+    so grid subclasses overriding those methods are not affected.
+
+    Examples:
+        GridBatchPredictor(view.grids.values()).predict()
+        for grid in view:
+            grid.predict()
+    """
+
+    def __init__(self, grids):
+        """
+        Args:
+            grids (list[GridPredictor]):
+        """
+        self.grids = list(grids)
+        self.config = self.grids[0].config if self.grids else None
+        self.result = [{} for _ in self.grids]
+
+    def crop(self, area, shape):
+        """
+        Args:
+            area (tuple): Relative area, see `GridPredictor.relative_crop()`.
+            shape (tuple): Output image shape, (width, height).
+
+        Returns:
+            np.ndarray: Shape (n, height, width, 3)
+        """
+        return np.stack([grid.relative_crop(area, shape=shape) for grid in self.grids])
+
+    def set(self, name, values):
+        for result, value in zip(self.result, values):
+            result[name] = value
+
+    def predict_enemy_scale(self):
+        images = self.crop((-0.415 - 0.7, -0.62 - 0.7, -0.415, -0.62), shape=(50, 50))
+        red = stack_color_similarity(images, (255, 130, 132))
+        yellow = stack_color_similarity(images, (255, 235, 156))
+        large = stack_match(TEMPLATE_ENEMY_L, red, similarity=0.75)
+        middle = stack_match(TEMPLATE_ENEMY_M, yellow)
+        small = stack_match(TEMPLATE_ENEMY_S, yellow)
+        scale = np.select([large, middle, small], [3, 2, 1], default=0)
+        self.set('enemy_scale', scale.tolist())
+
+    def predict_enemy_genre(self):
+        """
+        Batch the template loop in `GridPredictor.predict_enemy_genre()`,
+        siren boss icons are still checked by each grid.
+        """
+        templates = self.grids[0].template_enemy_genre
+        if any(template is None for template in templates.values()):
+            # Let grids raise the error
+            return
+
+        scaling_dic = self.config.MAP_ENEMY_GENRE_DETECTION_SCALING
+        image_dic = {}
+        genre = [None] * len(self.grids)
+        remain = np.ones(len(self.grids), dtype=bool)
+        for name, template in templates.items():
+            if not remain.any():
+                break
+            short_name = name[6:] if name.startswith('Siren_') else name
+            scaling = scaling_dic.get(short_name, 1)
+            scaling = (scaling,) if not isinstance(scaling, tuple) else scaling
+            for scale in scaling:
+                if scale not in image_dic:
+                    shape = tuple(np.round(np.array((60, 60)) * scale).astype(int))
+                    images = self.crop((-0.5, -1, 0.5, 0), shape=shape)
+                    n, h, w = images.shape[:3]
+                    image_dic[scale] = rgb2gray(images.reshape((n * h, w, 3))).reshape((n, h, w))
+
+                matched = stack_match(template, image_dic[scale], similarity=self.config.MAP_ENEMY_GENRE_SIMILARITY)
+                for index in np.where(matched & remain)[0]:
+                    genre[index] = name
+                remain &= ~matched
+
+        self.set('enemy_genre_template', genre)
+
+    def predict_boss(self):
+        images = self.crop((-0.55, -0.2, 0.45, 0.2), shape=(50, 20))
+        masks = stack_color_similarity(images, color=(255, 77, 82))
+        self.set('boss_icon', stack_match(TEMPLATE_ENEMY_BOSS, masks, similarity=0.75).tolist())
+        count = stack_hsv_count(self.crop((0.03, -0.15, 0.63, 0.15), shape=(50, 20)), h=(358 - 3, 358 + 3))
+        self.set('boss_icon_small_count', count.tolist())
+
+    def predict_fleet(self):
+        masks = stack_color_similarity(self.crop((-1, -2, -0.5, -1.5), shape=(50, 50)), color=(255, 255, 255))
+        self.set('fleet', stack_match(TEMPLATE_FLEET_AMMO, masks).tolist())
+
+    def predict_submarine(self):
+        masks = stack_color_similarity(self.crop((-0.86, 0.08, -0.36, 0.58), shape=(50, 50)), color=(255, 243, 156))
+        self.set('submarine', stack_match(TEMPLATE_SUBMARINE, masks).tolist())
+
+    def predict_mystery(self):
+        masks = stack_color_similarity(self.crop((-0.3, -2, 0.3, -0.6), shape=(20, 50)), color=(148, 255, 247))
+        self.set('mystery_count', stack_count(masks, lower=221).tolist())
+
+    def predict_current_fleet(self):
+        count = stack_hsv_count(self.crop((-0.5, -3.5, 0.5, -2.5), shape=(50, 50)), h=(141 - 3, 141 + 10))
+        self.set('current_fleet_count', count.tolist())
+
+    def predict(self):
+        if not self.grids:
+            return
+        self.predict_enemy_scale()
+        self.predict_enemy_genre()
+        self.predict_boss()
+        self.predict_fleet()
+        self.predict_submarine()
+        if self.config.MAP_HAS_MYSTERY:
+            self.predict_mystery()
+        self.predict_current_fleet()
+
+        for grid, result in zip(self.grids, self.result):
+            grid.batch_image = grid.image
+            grid.batch_result = result
+
+
+def batch_available(grids):
+    """
+    Args:
+        grids (list[GridPredictor]):
+
+    Returns:
+        bool: If all grids use the default `GridPredictor.predict()`
+    """
+    return bool(grids) and all(type(grid).predict is GridPredictor.predict for grid in grids)
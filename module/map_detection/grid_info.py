@@ -73,6 +73,13 @@ class GridInfo:
     weight = 1
 
     location = None
+    # GridColumns of the map that this grid belongs to
+    _columns = None
+
+    def __setattr__(self, key, value):
+        object.__setattr__(self, key, value)
+        if self._columns is not None:
+            self._columns.on_set(self, key, value)
 
     def decode(self, text):
         text = text.upper()
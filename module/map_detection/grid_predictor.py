@@ -8,6 +8,10 @@ from module.template.assets import *
 
 
 class GridPredictor:
+    # Results from GridBatchPredictor, valid only on `batch_image`
+    batch_image = None
+    batch_result = {}
+
     def __init__(self, location, image, corner, config):
         """
         Args:
@@ -42,6 +46,18 @@ class GridPredictor:
             dst=area2corner((0, 0, *self.config.HOMO_TILE)).astype(np.float32))
         self.homo_invt = cv2.invert(self.homo_data)[1]
 
+    def _batch_get(self, name):
+        """
+        Args:
+            name (str):
+
+        Returns:
+            Result of GridBatchPredictor on current image, or None if not available.
+        """
+        if self.batch_image is not self.image:
+            return None
+        return self.batch_result.get(name)
+
     def screen2grid(self, points):
         """
         Args:
@@ -171,6 +187,10 @@ class GridPredictor:
         Returns:
             int: 1: Small, 2: Middle, 3: Large, 0: Unknown.
         """
+        scale = self._batch_get('enemy_scale')
+        if scale is not None:
+            return scale
+
         image = self.relative_crop((-0.415 - 0.7, -0.62 - 0.7, -0.415, -0.62), shape=(50, 50))
         red = color_similarity_2d(image, (255, 130, 132))
         yellow = color_similarity_2d(image, (255, 235, 156))
@@ -202,6 +222,9 @@ class GridPredictor:
                 if TEMPLATE_ENEMY_BOSS.match(image, similarity=0.7):
                     return 'Siren_Siren'
 
+        if self.batch_image is self.image and 'enemy_genre_template' in self.batch_result:
+            return self.batch_result['enemy_genre_template']
+
         image_dic = {}
         scaling_dic = self.config.MAP_ENEMY_GENRE_DETECTION_SCALING
         for name, template in self.template_enemy_genre.items():
@@ -229,13 +252,19 @@ class GridPredictor:
         if self.enemy_genre == 'Siren_Siren':
             return False
 
-        image = self.relative_crop((-0.55, -0.2, 0.45, 0.2), shape=(50, 20))
-        image = color_similarity_2d(image, color=(255, 77, 82))
-        if TEMPLATE_ENEMY_BOSS.match(image, similarity=0.75):
+        boss_icon = self._batch_get('boss_icon')
+        if boss_icon is None:
+            image = self.relative_crop((-0.55, -0.2, 0.45, 0.2), shape=(50, 20))
+            image = color_similarity_2d(image, color=(255, 77, 82))
+            boss_icon = TEMPLATE_ENEMY_BOSS.match(image, similarity=0.75)
+        if boss_icon:
             return True
 
         # Small boss icon
-        if self.relative_hsv_count(area=(0.03, -0.15, 0.63, 0.15), h=(358 - 3, 358 + 3), shape=(50, 20)) > 100:
+        count = self._batch_get('boss_icon_small_count')
+        if count is None:
+            count = self.relative_hsv_count(area=(0.03, -0.15, 0.63, 0.15), h=(358 - 3, 358 + 3), shape=(50, 20))
+        if count > 100:
             image = self.relative_crop((0.03, -0.15, 0.63, 0.15), shape=(50, 20))
             image = color_similarity_2d(image, color=(255, 77, 82))
             if TEMPLATE_ENEMY_BOSS.match(image, similarity=0.7):
@@ -247,11 +276,19 @@ class GridPredictor:
         return self.relative_rgb_count(area=(-0.5, -1, 0.5, 0), color=(255, 255, 60), shape=(50, 50)) > 35
 
     def predict_fleet(self):
+        fleet = self._batch_get('fleet')
+        if fleet is not None:
+            return fleet
+
         image = self.relative_crop((-1, -2, -0.5, -1.5), shape=(50, 50))
         image = color_similarity_2d(image, color=(255, 255, 255))
         return TEMPLATE_FLEET_AMMO.match(image)
 
     def predict_submarine(self):
+        submarine = self._batch_get('submarine')
+        if submarine is not None:
+            return submarine
+
         image = self.relative_crop((-0.86, 0.08, -0.36, 0.58), shape=(50, 50))
         image = color_similarity_2d(image, color=(255, 243, 156))
         return TEMPLATE_SUBMARINE.match(image)
@@ -266,8 +303,10 @@ class GridPredictor:
             bool: True if is mystery.
         """
         # cyan question mark
-        if self.relative_rgb_count(
-                area=(-0.3, -2, 0.3, -0.6), color=(148, 255, 247), shape=(20, 50)) > 50:
+        count = self._batch_get('mystery_count')
+        if count is None:
+            count = self.relative_rgb_count(area=(-0.3, -2, 0.3, -0.6), color=(148, 255, 247), shape=(20, 50))
+        if count > 50:
             return True
         # white background
         # if self.relative_rgb_count(
@@ -277,7 +316,9 @@ class GridPredictor:
         return False
 
     def predict_current_fleet(self):
-        count = self.relative_hsv_count(area=(-0.5, -3.5, 0.5, -2.5), h=(141 - 3, 141 + 10), shape=(50, 50))
+        count = self._batch_get('current_fleet_count')
+        if count is None:
+            count = self.relative_hsv_count(area=(-0.5, -3.5, 0.5, -2.5), h=(141 - 3, 141 + 10), shape=(50, 50))
         if count < 600:
             return False
 
@@ -3,6 +3,7 @@ import time
 import numpy as np
 from PIL import ImageDraw, ImageOps
 
+from module.base.profiler import profile
 from module.base.utils import *
 from module.config.config import AzurLaneConfig
 from module.exception import MapDetectionError
@@ -63,6 +64,9 @@ class Homography:
         """
         self.config = config
         self.homo_loaded = False
+        # homo_loca of the last successful detection, and the expected shift from a swipe not yet seen
+        self.homo_loca_prev = None
+        self.track_shift = None
 
     @cached_property
     def ui_mask_homo_stroke(self):
@@ -152,7 +156,11 @@ class Homography:
         self.homo_invt = cv2.invert(homo)[1]
         self.homo_size = tuple(size.tolist())
         self.homo_loaded = True
+        # Lattice from another homography can't be tracked
+        self.homo_loca_prev = None
+        self.track_shift = None
 
+    @profile('map_detection', 'homography')
     def detect(self, image):
         """
         Args:
@@ -178,8 +186,11 @@ class Homography:
         # Image.fromarray(image_edge, mode='L').show()
 
         # Find free tile
-        if self.search_tile_center(image_edge, threshold_good=self.config.HOMO_CENTER_GOOD_THRESHOLD,
-                                   threshold=self.config.HOMO_CENTER_THRESHOLD):
+        if self.search_tile_track(image_edge, threshold=self.config.HOMO_CENTER_GOOD_THRESHOLD,
+                                  radius=self.config.HOMO_TRACK_RADIUS):
+            pass
+        elif self.search_tile_center(image_edge, threshold_good=self.config.HOMO_CENTER_GOOD_THRESHOLD,
+                                     threshold=self.config.HOMO_CENTER_THRESHOLD):
             pass
         elif self.search_tile_corner(image_edge, threshold=self.config.HOMO_CORNER_THRESHOLD):
             pass
@@ -189,6 +200,7 @@ class Homography:
             raise MapDetectionError('Failed to find a free tile')
 
         self.homo_loca %= self.config.HOMO_TILE
+        self._track_update()
 
         # Detect map edges
         self.lower_edge, self.upper_edge, self.left_edge, self.right_edge = False, False, False, False
@@ -214,6 +226,95 @@ class Homography:
             point2str(*self.homo_loca, length=3))
                     )
 
+    def track_swipe(self, vector):
+        """
+        Tell the camera is going to move, so the next `detect()` can predict tile lattice.
+
+        Args:
+            vector (tuple, np.ndarray): Camera movement in grids, float.
+        """
+        if self.homo_loca_prev is None:
+            return
+        self.track_shift = np.multiply(vector, self.config.HOMO_TILE)
+
+    def _track_candidates(self):
+        """
+        Returns:
+            list[np.ndarray]: Predicted homo_loca, the swiped one first, then the unmoved one.
+        """
+        if not self.config.HOMO_TRACK or self.homo_loca_prev is None:
+            return []
+        candidates = []
+        if self.track_shift is not None:
+            # Map content moves in the opposite direction of camera
+            candidates.append(self.homo_loca_prev - self.track_shift)
+        candidates.append(self.homo_loca_prev)
+        return candidates
+
+    def _track_update(self):
+        """
+        Remember the result of current detection for tracking.
+        """
+        if self.track_shift is not None and self.homo_loca_prev is not None:
+            tile = np.array(self.config.HOMO_TILE)
+            diff = np.abs((self.homo_loca - self.homo_loca_prev + tile / 2) % tile - tile / 2)
+            # Camera moved, swipe is done
+            if np.any(diff > 3):
+                self.track_shift = None
+        self.homo_loca_prev = np.array(self.homo_loca, dtype=float)
+
+    def search_tile_track(self, image, threshold=0.9, radius=25, tries=6):
+        """
+        Search for the center of empty tile, only around the tile lattice predicted from the previous detection.
+        Only a few small windows are matched, much faster than searching the whole image.
+
+        Args:
+            image (np.ndarray): Monochrome image.
+            threshold (float):
+            radius (int): Max error of prediction, in pixels.
+            tries (int): Number of tiles near image center to try for each prediction.
+
+        Returns:
+            bool: If success.
+        """
+        candidates = self._track_candidates()
+        if not candidates:
+            return False
+
+        template = ASSETS.tile_center_image
+        t_h, t_w = template.shape[:2]
+        h, w = image.shape[:2]
+        tile = np.array(self.config.HOMO_TILE)
+        center = np.array([w, h]) / 2
+        similarity = 0.
+        for homo_loca in candidates:
+            # Upper-left of template on tile center, same as the `loca` in `search_tile_center()`
+            base = (homo_loca + self.config.HOMO_CENTER_OFFSET) % tile
+            x = np.arange(base[0], w - t_w, tile[0])
+            y = np.arange(base[1], h - t_h, tile[1])
+            points = np.array(np.meshgrid(x, y)).reshape((2, -1)).T
+            if not len(points):
+                continue
+            points = points[np.argsort(np.linalg.norm(points - center, axis=1))][:tries]
+            for point in points:
+                x1, y1 = np.maximum(np.round(point - radius).astype(int), 0)
+                x2, y2 = np.round(point + radius).astype(int) + (t_w, t_h)
+                window = image[y1:y2, x1:x2]
+                if window.shape[0] < t_h or window.shape[1] < t_w:
+                    continue
+                result = cv2.matchTemplate(window, template, cv2.TM_CCOEFF_NORMED)
+                _, sim, _, loca = cv2.minMaxLoc(result)
+                similarity = max(similarity, sim)
+                if sim > threshold:
+                    loca = np.add(loca, (x1, y1))
+                    self.homo_loca = loca - self.config.HOMO_CENTER_OFFSET
+                    self.map_inner = loca
+                    logger.attr_align('tile_track', f'{float2str(sim)} (good match)')
+                    return True
+
+        logger.attr_align('tile_track', f'{float2str(similarity)} (bad match)')
+        return False
+
     def search_tile_center(self, image, threshold_good=0.9, threshold=0.8, encourage=1.0):
         """
         Search for the center of empty tile.
@@ -5,10 +5,12 @@ import numpy as np
 from PIL import Image, ImageDraw, ImageOps
 from scipy import signal
 
+from module.base.profiler import profile
 from module.base.utils import *
 from module.config.config import AzurLaneConfig
 from module.exception import MapDetectionError
 from module.logger import logger
+from module.map_detection.perspective_solver import PerspectiveSolver
 from module.map_detection.utils import *
 from module.map_detection.utils_assets import *
 
@@ -57,7 +59,9 @@ class Perspective:
             config (AzurLaneConfig):
         """
         self.config = config
+        self.solver = PerspectiveSolver(config)
 
+    @profile('map_detection', 'perspective')
     def load(self, image):
         """
         Args:
@@ -119,9 +123,13 @@ class Perspective:
 
         # Calculate perspective
         self.crossings = self.horizontal.cross(self.vertical)
-        self.vanish_point = optimize.brute(self._vanish_point_value, self.config.VANISH_POINT_RANGE)
-        distance_point_x = optimize.brute(self._distant_point_value, self.config.DISTANCE_POINT_X_RANGE)[0]
-        self.distant_point = (distance_point_x, self.vanish_point[1])
+        if self.config.PERSPECTIVE_SOLVER:
+            self.vanish_point = self.solver.vanish_point(self.vertical)
+            self.distant_point = self.solver.distant_point(self.crossings, self.vanish_point)
+        else:
+            self.vanish_point = optimize.brute(self._vanish_point_value, self.config.VANISH_POINT_RANGE)
+            distance_point_x = optimize.brute(self._distant_point_value, self.config.DISTANCE_POINT_X_RANGE)[0]
+            self.distant_point = (distance_point_x, self.vanish_point[1])
         logger.attr_align('vanish_point', point2str(*self.vanish_point, length=5))
         logger.attr_align('distant_point', point2str(*self.distant_point, length=5))
         if np.linalg.norm(np.subtract(self.vanish_point, self.distant_point)) < 10:
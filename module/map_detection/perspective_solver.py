@@ -0,0 +1,216 @@
+import numpy as np
+
+from module.map_detection.utils import Lines
+
+
+def vanish_point_values(vertical, points):
+    """
+    Vectorized `Perspective._vanish_point_value()` over multiple points.
+
+    Args:
+        vertical (Lines): Vertical lines.
+        points (np.ndarray): Shape (n, 2), [[x1, y1], [x2, y2], ...]
+
+    Returns:
+        np.ndarray: Shape (n,), the smaller the better.
+    """
+    x = points[:, 0, np.newaxis]
+    y = points[:, 1, np.newaxis]
+    distance = vertical.rho - x * vertical.cos - y * vertical.sin
+    # Add 0.001 to avoid log10(0).
+    return np.sum(np.log10(np.abs(distance) + 0.001), axis=1)
+
+
+def distant_point_values(crossings, xs, y):
+    """
+    Vectorized `Perspective._distant_point_value()` over multiple x.
+
+    Args:
+        crossings (Points): Crossings of horizontal and vertical lines.
+        xs (np.ndarray): Shape (n,)
+        y (float): Y of vanish point.
+
+    Returns:
+        np.ndarray: Shape (n,), the smaller the better.
+    """
+    cx = crossings.x[np.newaxis, :]
+    cy = crossings.y[np.newaxis, :]
+    xs = np.asarray(xs, dtype=float)[:, np.newaxis]
+    # X of lines linking crossings and (x, y) at Lines.MID_Y, same as `Points.link(...).mid`
+    mid = cx - (cy - Lines.MID_Y) * (cx - xs) / (cy - y)
+    mid = np.sort(mid, axis=1)
+    # Add 0.001 to avoid log10(0).
+    return np.sum(np.log10(np.diff(mid, axis=1) + 0.001), axis=1)
+
+
+def _mesh(ranges, num):
+    """
+    Args:
+        ranges (list[tuple[float]]): [(x_min, x_max), (y_min, y_max), ...]
+        num (int): Number of points on each axis.
+
+    Returns:
+        np.ndarray: Shape (num ** len(ranges), len(ranges))
+    """
+    axes = [np.linspace(low, high, num) for low, high in ranges]
+    return np.stack([m.ravel() for m in np.meshgrid(*axes, indexing='ij')], axis=1)
+
+
+def grid_search(func, ranges, num=20):
+    """
+    Minimize a vectorized function on a grid,
+    same as `scipy.optimize.brute(func, ranges, Ns=num)` without polishing.
+
+    Args:
+        func (callable): Function that receives an array in shape (n, dim) and returns shape (n,).
+        ranges (list[tuple[float]]):
+        num (int): Number of points on each axis.
+
+    Returns:
+        np.ndarray, float, np.ndarray: Best point, its value, and grid step on each axis.
+    """
+    ranges = [tuple(map(float, r)) for r in ranges]
+    points = _mesh(ranges, num)
+    values = func(points)
+    index = int(np.nanargmin(values))
+    step = np.array([(high - low) / (num - 1) for low, high in ranges])
+    return points[index], values[index], step
+
+
+def refine(func, best, value, step, fine=11, rounds=4):
+    """
+    Minimize a vectorized function on smaller grids around the best point.
+
+    Args:
+        func (callable):
+        best (np.ndarray): Best point of the previous grid.
+        value (float): Value of the best point.
+        step (np.ndarray): Step of the previous grid.
+        fine (int): Number of points on each axis.
+        rounds (int): Each round shrinks the step by (fine - 1) / 2.
+
+    Returns:
+        np.ndarray, float: Best point and its value.
+    """
+    for _ in range(rounds):
+        sub_ranges = [(b - s, b + s) for b, s in zip(best, step)]
+        points = _mesh(sub_ranges, fine)
+        values = func(points)
+        index = int(np.nanargmin(values))
+        if values[index] <= value:
+            best, value = points[index], values[index]
+        step = step * 2 / (fine - 1)
+
+    return best, value
+
+
+def coarse_to_fine(func, ranges, coarse=20, fine=11, rounds=4):
+    """
+    Minimize a vectorized function on a grid, then on smaller grids around the best point.
+    The first round is the same as `scipy.optimize.brute(func, ranges, Ns=coarse)` without polishing.
+
+    Args:
+        func (callable): Function that receives an array in shape (n, dim) and returns shape (n,).
+        ranges (list[tuple[float]]):
+        coarse (int): Number of points on each axis in the first round.
+        fine (int): Number of points on each axis in the following rounds.
+        rounds (int): Number of rounds after the first one, each shrinks the step by (fine - 1) / 2.
+
+    Returns:
+        np.ndarray, float, bool: Best point, its value, and if the best point of the first round is on border.
+    """
+    best, value, step = grid_search(func, ranges, num=coarse)
+    on_border = any(np.isclose(b, r[0]) or np.isclose(b, r[1]) for b, r in zip(best, ranges))
+    best, value = refine(func, best, value, step, fine=fine, rounds=rounds)
+    return best, value, on_border
+
+
+class PerspectiveSolver:
+    """
+    Solve vanish point and distant point of map grids, replacing `scipy.optimize.brute`.
+
+    Objective functions are the same as `Perspective._vanish_point_value()` and `_distant_point_value()`,
+    but evaluated on all grid points in one numpy call, then refined coarse-to-fine.
+    Vanish point doesn't move when camera is only panning on sea surface,
+    so it refines around the previous solution instead of the best point of the coarse grid,
+    if it's still better than the coarse grid.
+
+    Examples:
+        solver = PerspectiveSolver(config)
+        vanish_point = solver.vanish_point(vertical)
+        distant_point = solver.distant_point(crossings, vanish_point)
+    """
+    # Search area around the previous solution, in the steps of the full search
+    WARM_START_STEPS = 2
+
+    def __init__(self, config):
+        """
+        Args:
+            config (AzurLaneConfig):
+        """
+        self.config = config
+        self.prev_vanish_point = None
+        self.prev_distant_x = None
+
+    def _solve(self, func, ranges, prev):
+        """
+        Args:
+            func (callable):
+            ranges (tuple[tuple[float]]):
+            prev (np.ndarray): Previous solution or None.
+
+        Returns:
+            np.ndarray:
+        """
+        # Coarse grid on full range, same as the first round of `scipy.optimize.brute`
+        coarse, coarse_value, step = grid_search(func, ranges)
+        if prev is not None:
+            warm = [(p - s * self.WARM_START_STEPS, p + s * self.WARM_START_STEPS) for p, s in zip(prev, step)]
+            best, value, on_border = coarse_to_fine(func, warm, coarse=2 * self.WARM_START_STEPS + 1)
+            # Minimum on border means it's moving away, previous solution is no longer valid.
+            # Minimum worse than the coarse grid means it's a local one,
+            # vanish point changed after zooming or switching maps.
+            inside = all(low <= b <= high for b, (low, high) in zip(best, ranges))
+            if not on_border and inside and value <= coarse_value:
+                return best
+
+        best, _ = refine(func, coarse, coarse_value, step)
+        return best
+
+    def vanish_point(self, vertical):
+        """
+        Args:
+            vertical (Lines):
+
+        Returns:
+            np.ndarray: (x, y)
+        """
+        point = self._solve(
+            lambda points: vanish_point_values(vertical, points),
+            self.config.VANISH_POINT_RANGE,
+            self.prev_vanish_point,
+        )
+        self.prev_vanish_point = point
+        return point
+
+    def distant_point(self, crossings, vanish_point):
+        """
+        Args:
+            crossings (Points):
+            vanish_point (np.ndarray): (x, y)
+
+        Returns:
+            tuple[float]: (x, y), y is the same as vanish point.
+        """
+        y = vanish_point[1]
+        x = self._solve(
+            lambda points: distant_point_values(crossings, points[:, 0], y),
+            self.config.DISTANCE_POINT_X_RANGE,
+            self.prev_distant_x,
+        )
+        self.prev_distant_x = x
+        return x[0], y
+
+    def reset(self):
+        self.prev_vanish_point = None
+        self.prev_distant_x = None
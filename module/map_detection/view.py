@@ -1,12 +1,14 @@
 import collections
 import time
 
+from module.base.profiler import profile
 from module.base.utils import *
 from module.exception import MapDetectionError
 from module.logger import logger
 from module.map.map_grids import SelectedGrids
 from module.map_detection.detector import MapDetector
 from module.map_detection.grid import Grid
+from module.map_detection.grid_batch import GridBatchPredictor, batch_available
 from module.map_detection.utils import *
 from module.map_detection.utils_assets import *
 
@@ -49,6 +51,7 @@ class View(MapDetector):
         else:
             return cv2.copyTo(image, ASSETS.ui_mask_in_map)
 
+    @profile('map_detection', 'view')
     def load(self, image):
         """
         Args:
@@ -97,11 +100,15 @@ class View(MapDetector):
                 raise MapDetectionError(f'Camera outside map: offset=({x}, {y})')
             break
 
+    @profile('map_detection', 'predict')
     def predict(self):
         """
         Predict grid info.
         """
         start_time = time.time()
+        grids = list(self)
+        if self.config.MAP_GRID_BATCH_PREDICT and batch_available(grids):
+            GridBatchPredictor(grids).predict()
         for grid in self:
             grid.predict()
         logger.attr_align('predict', len(self.grids.keys()), front=float2str(time.time() - start_time) + 's')
@@ -1,11 +1,9 @@
 import os
-import numpy as np
-import cv2
-from PIL import Image
 
 from module.exception import RequestHumanTakeover
 from module.logger import logger
 from module.config.config import AzurLaneConfig
+from module.ocr.debug_capture import OCR_DEBUG_CAPTURE
 
 try:
     from rapidocr import RapidOCR, OCRVersion
@@ -16,6 +14,12 @@ except Exception as e:
     logger.critical('如果上述方法都无法解决，请加群获取支持')
     raise RequestHumanTakeover
 
+try:
+    from rapidocr.ch_ppocr_rec import TextRecInput
+except Exception:
+    # Batched recognition is unavailable in this version of rapidocr
+    TextRecInput = None
+
 USE_GPU = False
 config_name = os.environ.get('ALAS_CONFIG_NAME')
 if config_name:
@@ -37,6 +41,7 @@ class CnModel:
             "Rec.ocr_version": OCRVersion.PPOCRV5,
             "Rec.model_path": "bin/ocr_models/zh-CN/alocr-zh-cn-v2.5.dtk.onnx",
             "Rec.rec_keys_path": "bin/ocr_models/zh-CN/cn.txt",
+            "Rec.rec_batch_num": 16,
             "EngineConfig.onnxruntime.use_dml": USE_GPU
         }
         self.model = RapidOCR(params=self.params)
@@ -51,6 +56,7 @@ class EnModel:
             "Rec.ocr_version": OCRVersion.PPOCRV4,
             "Rec.model_path": "bin/ocr_models/en-US/alocr-en-us-v2.0.nvc.onnx",
             "Rec.rec_keys_path": "bin/ocr_models/en-US/en.txt",
+            "Rec.rec_batch_num": 16,
             "EngineConfig.onnxruntime.use_dml": USE_GPU
         }
         self.model = RapidOCR(params=self.params)
@@ -77,46 +83,24 @@ class AlOcr:
         if not self._model_loaded:
             self.init()
 
-    def _save_debug_image(self, img, result):
-        folder = 'ocr_debug'
-        if not os.path.exists(folder):
-            os.makedirs(folder)
-
-        # Get current time for filename uniqueness and sorting
-        import time
-        now = int(time.time() * 1000)
-        # Clean result for filename
-        res_clean = str(result).replace('\n', ' ').replace('\r', ' ').strip()
-        # Remove invalid filename characters, keep some safe ones
-        res_clean = "".join([c for c in res_clean if c.isalnum() or c in (' ', '_', '-')]).strip()
-        if not res_clean:
-            res_clean = 'empty'
-        
-        filename = f"{self.name}_{res_clean}_{now}.png"
-        filepath = os.path.join(folder, filename)
+    def new_session(self):
+        """
+        Create another instance of the same model with its own inference session,
+        to run OCR in parallel, used by OCR server.
 
-        try:
-            if isinstance(img, np.ndarray):
-                cv2.imwrite(filepath, img)
-            elif isinstance(img, Image.Image):
-                img.save(filepath)
-            elif isinstance(img, str) and os.path.exists(img):
-                import shutil
-                shutil.copy(img, filepath)
-            
-            # Limit count to 100
-            files = [os.path.join(folder, f) for f in os.listdir(folder) if os.path.isfile(os.path.join(folder, f))]
-            if len(files) > 100:
-                files.sort(key=os.path.getmtime)
-                # Keep the last 100
-                for f in files[:-100]:
-                    try:
-                        os.remove(f)
-                    except:
-                        pass
-        except Exception as e:
-            # We don't want to crash the main process due to debug saving failure
-            logger.warning(f'Failed to save OCR debug image: {e}')
+        Returns:
+            AlOcr:
+        """
+        session = AlOcr(name=self.name)
+        if self.name in ['cn', 'zhcn']:
+            session.model = CnModel().model
+        else:
+            session.model = EnModel().model
+        session._model_loaded = True
+        return session
+
+    def _save_debug_image(self, img, result):
+        OCR_DEBUG_CAPTURE.save(img, result, name=self.name)
 
     def ocr(self, img_fp):
         logger.info(f"[VERBOSE] AlOcr.ocr: Ensure loaded...")
@@ -137,8 +121,55 @@ class AlOcr:
     def ocr_for_single_line(self, img_fp):
         return self.ocr(img_fp)
 
+    def _rec_batch(self, img_list):
+        """
+        Recognize multiple single line images in batches with the recognition session of rapidocr.
+        TextRecognizer sorts images by width ratio and pads each batch to its widest one,
+        so lines in similar width are inferred together.
+
+        Same as `RapidOCR.__call__()` without detection, images are resized by `preprocess_img()`
+        and results are returned regardless of score, so it reads the same as `ocr()` one by one.
+        Check it with dev_tools/ocr_batch_check.py
+
+        Args:
+            img_list (list[np.ndarray]):
+
+        Returns:
+            list[str]: Results in the same order as `img_list`, or None if batching is unavailable.
+        """
+        text_rec = getattr(self.model, 'text_rec', None)
+        load_img = getattr(self.model, 'load_img', None)
+        preprocess_img = getattr(self.model, 'preprocess_img', None)
+        if TextRecInput is None or text_rec is None or load_img is None or preprocess_img is None:
+            return None
+        try:
+            images = []
+            for img in img_list:
+                img = preprocess_img(load_img(img))
+                # rapidocr returns (image, op_record)
+                if isinstance(img, tuple):
+                    img = img[0]
+                images.append(img)
+            res = text_rec(TextRecInput(img=images))
+        except Exception as e:
+            logger.warning(f'AlOcr batched recognition failed, fallback to one by one: {e}')
+            return None
+        txts = list(res.txts) if res.txts else []
+        if len(txts) != len(img_list):
+            logger.warning(f'AlOcr batched recognition returned {len(txts)} results '
+                           f'for {len(img_list)} images, fallback to one by one')
+            return None
+        return [str(txt) for txt in txts]
+
     def ocr_for_single_lines(self, img_list):
         self._ensure_loaded()
+        if len(img_list) > 1:
+            results = self._rec_batch(img_list)
+            if results is not None:
+                for img, txt in zip(img_list, results):
+                    self._save_debug_image(img, txt)
+                return results
+
         results = []
         for i, img in enumerate(img_list):
             try:
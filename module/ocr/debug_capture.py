@@ -0,0 +1,151 @@
+import os
+import queue
+import random
+import shutil
+import threading
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from module.config.config_manual import ManualConfig
+from module.logger import logger
+
+
+class OcrDebugCapture:
+    """
+    Save OCR input images and results into a folder for debugging, without blocking OCR.
+
+    Images are copied and put into a queue, a background thread writes them to disk.
+    Files written are tracked in an in-memory ring, the oldest one is removed once the ring is full,
+    so the folder is scanned only once at startup.
+    If disk can't catch up, new images are dropped.
+
+    Examples:
+        capture = OcrDebugCapture(folder='ocr_debug', limit=100)
+        capture.save(image, result='123', name='cn')
+    """
+    # Max images waiting to be written
+    QUEUE_SIZE = 32
+
+    def __init__(self, folder='ocr_debug', limit=100, sample=1.0, enabled=False):
+        """
+        Args:
+            folder (str):
+            limit (int): Max number of files to keep in folder.
+            sample (float): 0-1, ratio of OCR calls to be saved.
+            enabled (bool):
+        """
+        self.folder = folder
+        self.limit = limit
+        self.sample = sample
+        self.enabled = enabled
+        self.queue = queue.Queue(maxsize=self.QUEUE_SIZE)
+        self.files = None
+        self.lock = threading.Lock()
+        self.thread = None
+        self.dropped = 0
+        self._last_time = 0
+
+    def _start(self):
+        with self.lock:
+            if self.thread is not None and self.thread.is_alive():
+                return
+            self.thread = threading.Thread(target=self._worker, daemon=True, name='OcrDebugCapture')
+            self.thread.start()
+
+    def save(self, img, result, name=''):
+        """
+        Args:
+            img (np.ndarray, Image.Image, str): Image or filepath.
+            result (str): OCR result.
+            name (str): Name of OCR model.
+        """
+        if not self.enabled:
+            return
+        if self.sample < 1 and random.random() >= self.sample:
+            return
+        # Input images might be views of a reused screenshot buffer
+        if isinstance(img, np.ndarray):
+            img = img.copy()
+        elif isinstance(img, Image.Image):
+            img = img.copy()
+        try:
+            self.queue.put_nowait((img, str(result), name, time.time()))
+        except queue.Full:
+            self.dropped += 1
+            return
+        self._start()
+
+    def _init_files(self):
+        """
+        Collect existing files, oldest first.
+        """
+        self.files = deque()
+        if not os.path.exists(self.folder):
+            os.makedirs(self.folder)
+            return
+        files = [os.path.join(self.folder, f) for f in os.listdir(self.folder)]
+        files = [f for f in files if os.path.isfile(f)]
+        files.sort(key=os.path.getmtime)
+        self.files.extend(files)
+        self._trim()
+
+    def _trim(self):
+        while len(self.files) > self.limit:
+            file = self.files.popleft()
+            try:
+                os.remove(file)
+            except OSError:
+                pass
+
+    def _filepath(self, result, name, timestamp):
+        # Clean result for filename
+        res_clean = result.replace('\n', ' ').replace('\r', ' ').strip()
+        # Remove invalid filename characters, keep some safe ones
+        res_clean = "".join([c for c in res_clean if c.isalnum() or c in (' ', '_', '-')]).strip()
+        if not res_clean:
+            res_clean = 'empty'
+        now = int(timestamp * 1000)
+        # Keep filenames unique when multiple lines are captured in the same millisecond
+        if now <= self._last_time:
+            now = self._last_time + 1
+        self._last_time = now
+        return os.path.join(self.folder, f"{name}_{res_clean}_{now}.png")
+
+    def _write(self, img, result, name, timestamp):
+        if self.files is None:
+            self._init_files()
+        filepath = self._filepath(result, name, timestamp)
+        if isinstance(img, np.ndarray):
+            cv2.imwrite(filepath, img)
+        elif isinstance(img, Image.Image):
+            img.save(filepath)
+        elif isinstance(img, str) and os.path.exists(img):
+            shutil.copy(img, filepath)
+        else:
+            return
+        self.files.append(filepath)
+        self._trim()
+
+    def _worker(self):
+        while 1:
+            img, result, name, timestamp = self.queue.get()
+            try:
+                self._write(img, result, name, timestamp)
+            except Exception as e:
+                # We don't want to crash the main process due to debug saving failure
+                logger.warning(f'Failed to save OCR debug image: {e}')
+            if self.dropped:
+                logger.warning(f'Dropped {self.dropped} OCR debug images, disk is too slow')
+                self.dropped = 0
+
+
+OCR_DEBUG_CAPTURE = OcrDebugCapture(
+    folder='ocr_debug',
+    limit=ManualConfig.OCR_DEBUG_IMAGE_LIMIT,
+    sample=ManualConfig.OCR_DEBUG_IMAGE_SAMPLE,
+    enabled=ManualConfig.OCR_DEBUG_IMAGE,
+)
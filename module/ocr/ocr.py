@@ -5,8 +5,10 @@ from typing import TYPE_CHECKING
 import module.config.server as server
 from module.base.button import Button
 from module.base.decorator import cached_property
+from module.base.profiler import profiler
 from module.base.utils import *
 from module.logger import logger
+from module.ocr.ocr_cache import OCR_CACHE
 from module.ocr.rpc import ModelProxyFactory
 from module.webui.setting import State
 
@@ -79,6 +81,26 @@ class Ocr:
         """
         return result
 
+    def ocr_cached(self, image_list):
+        """
+        Run OCR model on images not in `OCR_CACHE`.
+
+        Args:
+            image_list (list[np.ndarray]): Preprocessed line images.
+
+        Returns:
+            list: Raw results from model.
+        """
+        keys = [OCR_CACHE.key(self.lang, self.alphabet, image) for image in image_list]
+        result_list = [OCR_CACHE.get(key) for key in keys]
+        missing = [index for index, result in enumerate(result_list) if result is None]
+        if missing:
+            results = self.cnocr.atomic_ocr_for_single_lines([image_list[i] for i in missing], self.alphabet)
+            for index, result in zip(missing, results):
+                result_list[index] = result
+                OCR_CACHE.put(keys[index], result)
+        return result_list
+
     def ocr(self, image, direct_ocr=False):
         """
         Args:
@@ -100,14 +122,16 @@ class Ocr:
         # This will show the images feed to OCR model
         # self.cnocr.debug(image_list)
 
-        result_list = self.cnocr.atomic_ocr_for_single_lines(image_list, self.alphabet)
+        result_list = self.ocr_cached(image_list)
         result_list = [''.join(result) for result in result_list]
         result_list = [self.after_process(result) for result in result_list]
 
         if len(self.buttons) == 1:
             result_list = result_list[0]
+        cost = time.time() - start_time
+        profiler.add('ocr', self.name, cost)
         if self.SHOW_LOG:
-            logger.attr(name='%s %ss' % (self.name, float2str(time.time() - start_time)),
+            logger.attr(name='%s %ss' % (self.name, float2str(cost)),
                         text=str(result_list))
 
         return result_list
@@ -0,0 +1,105 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+from module.base.profiler import profiler
+from module.config.config_manual import ManualConfig
+
+
+class OcrCache:
+    """
+    LRU cache of OCR results, keyed by model, alphabet and the hash of preprocessed line images.
+
+    Counters, timers and resources are usually re-read on identical pixels while waiting,
+    results of identical inputs are reused instead of running inference again.
+    Works before the model is called, so it's the same in local mode and OCR server mode.
+
+    Examples:
+        key = OCR_CACHE.key('azur_lane', '0123456789', image)
+        result = OCR_CACHE.get(key)
+        if result is None:
+            result = model.ocr(image)
+            OCR_CACHE.put(key, result)
+    """
+
+    def __init__(self, size=256, enabled=True):
+        """
+        Args:
+            size (int): Max number of results to keep.
+            enabled (bool):
+        """
+        self.size = size
+        self.enabled = enabled and size > 0
+        self.data = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(lang, alphabet, image):
+        """
+        Args:
+            lang (str): Model name.
+            alphabet (str): Alphabet white list, or None.
+            image (np.ndarray): Preprocessed line image.
+
+        Returns:
+            tuple:
+        """
+        digest = hashlib.blake2b(image.tobytes(), digest_size=16).digest()
+        return lang, alphabet, image.shape, image.dtype.str, digest
+
+    def get(self, key):
+        """
+        Returns:
+            Cached result, or None if not cached.
+        """
+        if not self.enabled:
+            return None
+        with self.lock:
+            try:
+                result = self.data[key]
+            except KeyError:
+                self.misses += 1
+                profiler.add('ocr_cache', 'miss', 0.)
+                return None
+            self.data.move_to_end(key)
+            self.hits += 1
+        profiler.add('ocr_cache', 'hit', 0.)
+        return result
+
+    def put(self, key, result):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.data[key] = result
+            self.data.move_to_end(key)
+            while len(self.data) > self.size:
+                self.data.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.
+
+    def stats(self):
+        """
+        Returns:
+            dict: Size, hits, misses and hit rate since started.
+        """
+        return {
+            'size': len(self.data),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hit_rate, 3),
+        }
+
+
+OCR_CACHE = OcrCache(
+    size=ManualConfig.OCR_CACHE_SIZE,
+    enabled=ManualConfig.OCR_CACHE,
+)
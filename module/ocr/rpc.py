@@ -1,29 +1,98 @@
 import argparse
+import math
 import multiprocessing
 import pickle
+import threading
+import time
+from collections import deque
+
+import numpy as np
 
 from module.logger import logger
 from module.webui.setting import State
 
 process: multiprocessing.Process = None
 
+# Seconds to retry OCR server after it went offline
+OCR_SERVER_RETRY = 60
+
+
+def pack_images(images):
+    """
+    Args:
+        images (list[np.ndarray]):
+
+    Returns:
+        list[np.ndarray], list[tuple]: Contiguous uint8 images and their shapes.
+    """
+    images = [np.ascontiguousarray(image, dtype=np.uint8) for image in images]
+    return images, [image.shape for image in images]
+
+
+def unpack_images(buffer, shapes):
+    """
+    Copy images out of a buffer written by `pack_images()`.
+
+    Args:
+        buffer (bytes, memoryview):
+        shapes (list[tuple]):
+
+    Returns:
+        list[np.ndarray]:
+    """
+    images = []
+    offset = 0
+    for shape in shapes:
+        shape = tuple(shape)
+        size = math.prod(shape)
+        image = np.frombuffer(buffer, dtype=np.uint8, count=size, offset=offset).reshape(shape).copy()
+        images.append(image)
+        offset += size
+    return images
+
+
+def percentile(values, q):
+    if not values:
+        return 0.
+    values = sorted(values)
+    return values[min(int(len(values) * q), len(values) - 1)]
+
 
 class ModelProxy:
+    """
+    Client of OCR server.
+
+    Line images are sent in one `ocr_batch_shm` call through shared memory if server is on the same machine,
+    or as raw bytes in `ocr_batch` if not. If server can't read shared memory, raw bytes are used instead.
+    Other calls use the legacy pickle protocol.
+    If server is unreachable, OCR runs on local models and server is retried after `OCR_SERVER_RETRY` seconds.
+    """
     client = None
     online = True
+    offline_time = 0.
+    address = ''
+    lock = threading.Lock()
+    # Shared memory reused between calls, grows on demand
+    shm = None
+    # False if server is reachable but failed to read shared memory
+    shm_enabled = True
+    # Round trip time of recent batch calls
+    latency = deque(maxlen=1000)
 
     @classmethod
     def init(cls, address="127.0.0.1:22268"):
         import zerorpc
 
         logger.info(f"Connecting to OCR server {address}")
+        cls.address = address
+        cls.shm_enabled = True
         cls.client = zerorpc.Client(timeout=5)
         cls.client.connect(f"tcp://{address}")
         try:
             cls.client.hello()
             logger.info("Successfully connected to OCR server")
         except:
-            cls.online = False
+            cls.set_offline()
             logger.warning("Ocr server not running")
 
     @classmethod
@@ -33,6 +102,121 @@ class ModelProxy:
             cls.client.close()
             logger.info('Successfully disconnected to OCR server')
             cls.client = None
+        cls._shm_drop()
+
+    @classmethod
+    def _shm_drop(cls):
+        """
+        Release shared memory, it will be created again on next batch.
+        """
+        if cls.shm is None:
+            return
+        try:
+            cls.shm.close()
+            cls.shm.unlink()
+        except FileNotFoundError:
+            # Already unlinked by others, such as the resource tracker of a server on Python < 3.13
+            pass
+        cls.shm = None
+
+    @classmethod
+    def set_offline(cls):
+        if ModelProxy.online:
+            logger.warning(f'OCR server {cls.address} offline, use local OCR models, '
+                           f'retry in {OCR_SERVER_RETRY}s')
+        ModelProxy.online = False
+        ModelProxy.offline_time = time.time()
+
+    @classmethod
+    def is_online(cls):
+        if not ModelProxy.online and time.time() - ModelProxy.offline_time > OCR_SERVER_RETRY:
+            ModelProxy.online = True
+        return ModelProxy.online
+
+    @classmethod
+    def is_local(cls):
+        host = cls.address.rsplit(':', 1)[0]
+        return host in ['127.0.0.1', 'localhost']
+
+    @classmethod
+    def _shm_write(cls, images):
+        """
+        Returns:
+            str: Name of shared memory.
+        """
+        from multiprocessing import shared_memory
+
+        size = max(sum(image.nbytes for image in images), 1)
+        if cls.shm is None or cls.shm.size < size:
+            cls._shm_drop()
+            # Leave room for larger batches
+            cls.shm = shared_memory.SharedMemory(create=True, size=max(size * 2, 65536))
+        offset = 0
+        for image in images:
+            cls.shm.buf[offset:offset + image.nbytes] = image.tobytes()
+            offset += image.nbytes
+        return cls.shm.name
+
+    def ocr_batch(self, img_list, cand_alphabet=None):
+        """
+        Args:
+            img_list (list[np.ndarray]):
+            cand_alphabet (str):
+
+        Returns:
+            list[str]:
+
+        Raises:
+            Exception: If server failed.
+        """
+        images, shapes = pack_images(img_list)
+        with ModelProxy.lock:
+            start = time.perf_counter()
+            shm_failed = False
+            if ModelProxy.shm_enabled and self.is_local():
+                try:
+                    name = self._shm_write(images)
+                except OSError as e:
+                    logger.warning(f'Failed to create shared memory for OCR: {e}')
+                    name = None
+                if name is not None:
+                    try:
+                        result = self.client("ocr_batch_shm", self.lang, name, shapes, cand_alphabet)
+                        ModelProxy.latency.append(time.perf_counter() - start)
+                        return result
+                    except Exception as e:
+                        # Shared memory may be gone, don't reuse it
+                        logger.warning(f'OCR server failed on shared memory, send images in bytes: {e}')
+                        self._shm_drop()
+                        shm_failed = True
+            payload = b''.join(image.tobytes() for image in images)
+            result = self.client("ocr_batch", self.lang, payload, shapes, cand_alphabet)
+            if shm_failed:
+                # Server is fine but shared memory is not, stop trying it
+                logger.warning('Shared memory disabled for OCR server')
+                ModelProxy.shm_enabled = False
+            ModelProxy.latency.append(time.perf_counter() - start)
+            return result
+
+    @classmethod
+    def health(cls):
+        """
+        Returns:
+            dict: Health report from server, with client side latency. None if server offline.
+        """
+        if cls.client is None or not cls.is_online():
+            return None
+        try:
+            with cls.lock:
+                report = cls.client("health")
+        except Exception as e:
+            logger.warning(f'Failed to get OCR server health: {e}')
+            cls.set_offline()
+            return None
+        latency = list(cls.latency)
+        report['client_p50'] = round(percentile(latency, 0.5), 4)
+        report['client_p95'] = round(percentile(latency, 0.95), 4)
+        return report
 
     def __init__(self, lang) -> None:
         self.lang = lang
@@ -45,12 +229,12 @@ class ModelProxy:
         Returns:
 
         """
-        if self.online:
+        if self.is_online():
             img_str = img_fp.dumps()
             try:
                 return self.client("ocr", self.lang, img_str)
             except:
-                self.online = False
+                self.set_offline()
         from module.ocr.models import OCR_MODEL
         return OCR_MODEL.__getattribute__(self.lang).ocr(img_fp)
 
@@ -62,12 +246,12 @@ class ModelProxy:
         Returns:
 
         """
-        if self.online:
-            img_str = img_fp.dumps()
+        if self.is_online():
             try:
-                return self.client("ocr_for_single_line", self.lang, img_str)
-            except:
-                self.online = False
+                return self.ocr_batch([img_fp])[0]
+            except Exception as e:
+                logger.warning(f'OCR server error: {e}')
+                self.set_offline()
         from module.ocr.models import OCR_MODEL
         return OCR_MODEL.__getattribute__(self.lang).ocr_for_single_line(img_fp)
 
@@ -79,21 +263,21 @@ class ModelProxy:
         Returns:
 
         """
-        if self.online:
-            img_str_list = [img_fp.dumps() for img_fp in img_list]
+        if self.is_online():
             try:
-                return self.client("ocr_for_single_lines", self.lang, img_str_list)
-            except:
-                self.online = False
+                return self.ocr_batch(img_list)
+            except Exception as e:
+                logger.warning(f'OCR server error: {e}')
+                self.set_offline()
         from module.ocr.models import OCR_MODEL
         return OCR_MODEL.__getattribute__(self.lang).ocr_for_single_lines(img_list)
 
     def set_cand_alphabet(self, cand_alphabet: str):
-        if self.online:
+        if self.is_online():
             try:
                 return self.client("set_cand_alphabet", self.lang, cand_alphabet)
             except:
-                self.online = False
+                self.set_offline()
         from module.ocr.models import OCR_MODEL
         return OCR_MODEL.__getattribute__(self.lang).set_cand_alphabet(cand_alphabet)
 
@@ -106,12 +290,12 @@ class ModelProxy:
         Returns:
 
         """
-        if self.online:
+        if self.is_online():
             img_str = img_fp.dumps()
             try:
                 return self.client("atomic_ocr", self.lang, img_str, cand_alphabet)
             except:
-                self.online = False
+                self.set_offline()
         from module.ocr.models import OCR_MODEL
         return OCR_MODEL.__getattribute__(self.lang).atomic_ocr(img_fp, cand_alphabet)
 
@@ -124,12 +308,12 @@ class ModelProxy:
         Returns:
 
         """
-        if self.online:
-            img_str = img_fp.dumps()
+        if self.is_online():
             try:
-                return self.client("atomic_ocr_for_single_line", self.lang, img_str, cand_alphabet)
-            except:
-                self.online = False
+                return self.ocr_batch([img_fp], cand_alphabet)[0]
+            except Exception as e:
+                logger.warning(f'OCR server error: {e}')
+                self.set_offline()
         from module.ocr.models import OCR_MODEL
         return OCR_MODEL.__getattribute__(self.lang).atomic_ocr_for_single_line(img_fp, cand_alphabet)
 
@@ -142,12 +326,12 @@ class ModelProxy:
         Returns:
 
         """
-        if self.online:
-            img_str_list = [img_fp.dumps() for img_fp in img_list]
+        if self.is_online():
             try:
-                return self.client("atomic_ocr_for_single_lines", self.lang, img_str_list, cand_alphabet)
-            except:
-                self.online = False
+                return self.ocr_batch(img_list, cand_alphabet)
+            except Exception as e:
+                logger.warning(f'OCR server error: {e}')
+                self.set_offline()
         from module.ocr.models import OCR_MODEL
         return OCR_MODEL.__getattribute__(self.lang).atomic_ocr_for_single_lines(img_list, cand_alphabet)
 
@@ -159,12 +343,12 @@ class ModelProxy:
         Returns:
 
         """
-        if self.online:
+        if self.is_online():
             img_str_list = [img_fp.dumps() for img_fp in img_list]
             try:
                 return self.client("debug", self.lang, img_str_list)
             except:
-                self.online = False
+                self.set_offline()
         from module.ocr.models import OCR_MODEL
         return OCR_MODEL.__getattribute__(self.lang).debug(img_list)
 
@@ -182,16 +366,229 @@ class ModelProxyFactory:
         ModelProxy.close()
 
 
-def start_ocr_server(port=22268):
+class OcrServerStats:
+    """
+    Counters and latency of recent batches in OCR server.
+    """
+
+    def __init__(self, size=1000):
+        self.start_time = time.time()
+        self.requests = 0
+        self.images = 0
+        self.batches = 0
+        self.errors = 0
+        # Seconds a request waits before its batch starts
+        self.wait = deque(maxlen=size)
+        # Seconds of batch inference
+        self.infer = deque(maxlen=size)
+        self.batch_size = deque(maxlen=size)
+
+    def add_batch(self, images, infer, waits):
+        """
+        Args:
+            images (int): Number of images in batch.
+            infer (float): Inference time.
+            waits (list[float]): Wait time of each request in batch.
+        """
+        self.requests += len(waits)
+        self.images += images
+        self.batches += 1
+        self.infer.append(infer)
+        self.batch_size.append(images)
+        self.wait.extend(waits)
+
+    def report(self):
+        """
+        Returns:
+            dict:
+        """
+        wait = list(self.wait)
+        infer = list(self.infer)
+        batch_size = list(self.batch_size)
+        return {
+            'uptime': round(time.time() - self.start_time, 1),
+            'requests': self.requests,
+            'images': self.images,
+            'batches': self.batches,
+            'errors': self.errors,
+            'batch_size_mean': round(sum(batch_size) / len(batch_size), 2) if batch_size else 0.,
+            'wait_p50': round(percentile(wait, 0.5), 4),
+            'wait_p95': round(percentile(wait, 0.95), 4),
+            'infer_p50': round(percentile(infer, 0.5), 4),
+            'infer_p95': round(percentile(infer, 0.95), 4),
+        }
+
+
+class OcrBatcher:
+    """
+    Micro-batching of OCR requests in OCR server.
+
+    Requests from all clients to the same model within `BATCH_WINDOW` are merged into one inference,
+    which runs in a thread on one of the model sessions in pool,
+    so the gevent loop of zerorpc keeps receiving requests while models are running.
+    """
+    # Seconds to wait for more requests before running a batch
+    BATCH_WINDOW = 0.005
+    # Run a batch immediately when it has this many images
+    BATCH_MAX = 64
+
+    def __init__(self, sessions=2):
+        """
+        Args:
+            sessions (int): Number of inference sessions of each model.
+        """
+        from gevent.threadpool import ThreadPool
+
+        self.sessions = max(int(sessions), 1)
+        # Key: model name. Value: gevent.queue.Queue of idle AlOcr sessions
+        self.pools = {}
+        # Key: model name. Value: list of (images, cand_alphabet, AsyncResult, submit time)
+        self.pending = {}
+        self.threadpool = ThreadPool(maxsize=self.sessions * 2)
+        self.stats = OcrServerStats()
+
+    def _pool(self, model):
+        """
+        Args:
+            model (AlOcr): Default session of model.
+
+        Returns:
+            gevent.queue.Queue:
+        """
+        from gevent.queue import Queue
+
+        try:
+            return self.pools[model.name]
+        except KeyError:
+            pass
+        pool = Queue()
+        pool.put(model)
+        self.pools[model.name] = pool
+        for _ in range(self.sessions - 1):
+            pool.put(self.threadpool.apply(model.new_session))
+        logger.info(f'OCR model {model.name} loaded with {self.sessions} sessions')
+        return pool
+
+    def submit(self, model, images, cand_alphabet=None):
+        """
+        Args:
+            model (AlOcr):
+            images (list[np.ndarray]):
+            cand_alphabet (str):
+
+        Returns:
+            list[str]:
+        """
+        import gevent
+        from gevent.event import AsyncResult
+
+        result = AsyncResult()
+        pending = self.pending.setdefault(model.name, [])
+        pending.append((images, cand_alphabet, result, time.perf_counter()))
+        if len(pending) == 1:
+            gevent.spawn_later(self.BATCH_WINDOW, self.flush, model)
+        elif sum(len(request[0]) for request in pending) >= self.BATCH_MAX:
+            gevent.spawn(self.flush, model)
+        return result.get()
+
+    def flush(self, model):
+        """
+        Run pending requests of a model in one batch.
+
+        Args:
+            model (AlOcr):
+        """
+        pending = self.pending.pop(model.name, [])
+        if not pending:
+            return
+        images = [image for request in pending for image in request[0]]
+        pool = None
+        session = None
+        start = time.perf_counter()
+        try:
+            # Sessions are created on first use, which may fail as well
+            pool = self._pool(model)
+            session = pool.get()
+            start = time.perf_counter()
+            results = self.threadpool.apply(session.ocr_for_single_lines, (images,))
+        except Exception as e:
+            logger.exception(e)
+            self.stats.errors += 1
+            for request in pending:
+                request[2].set_exception(e)
+            return
+        finally:
+            if session is not None:
+                pool.put(session)
+        self.stats.add_batch(len(images), time.perf_counter() - start,
+                             waits=[start - request[3] for request in pending])
+
+        index = 0
+        for request_images, cand_alphabet, result, _ in pending:
+            texts = results[index:index + len(request_images)]
+            index += len(request_images)
+            if cand_alphabet:
+                texts = [''.join([c for c in text if c in cand_alphabet]) for text in texts]
+            result.set(texts)
+
+    def report(self):
+        """
+        Returns:
+            dict: Server stats, with number of sessions and requests waiting.
+        """
+        report = self.stats.report()
+        report['sessions'] = self.sessions
+        report['busy'] = {name: self.sessions - pool.qsize() for name, pool in self.pools.items()}
+        report['pending'] = sum(len(pending) for pending in self.pending.values())
+        return report
+
+
+def start_ocr_server(port=22268, sessions=2):
+    import gevent
     import zerorpc
     import zmq
     from module.ocr.al_ocr import AlOcr
     from module.ocr.models import OcrModel
 
+    batcher = OcrBatcher(sessions=sessions)
+
     class OCRServer(OcrModel):
         def hello(self):
             return "hello"
 
+        def health(self):
+            return batcher.report()
+
+        def ocr_batch(self, lang, payload, shapes, cand_alphabet):
+            """
+            Line images in raw bytes, from clients on other machines.
+            """
+            images = unpack_images(payload, shapes)
+            cnocr: AlOcr = self.__getattribute__(lang)
+            return batcher.submit(cnocr, images, cand_alphabet)
+
+        def ocr_batch_shm(self, lang, name, shapes, cand_alphabet):
+            """
+            Line images in shared memory, from clients on the same machine.
+            """
+            from multiprocessing import shared_memory
+            try:
+                # Don't let resource tracker of server unlink memory owned by client
+                shm = shared_memory.SharedMemory(name=name, track=False)
+            except TypeError:
+                shm = shared_memory.SharedMemory(name=name)
+                # Python < 3.13 registers attached memory on POSIX only, unregister it manually.
+                # Don't touch resource tracker on Windows, it can't be started there
+                if shared_memory._USE_POSIX:
+                    from multiprocessing import resource_tracker
+                    resource_tracker.unregister(shm._name, 'shared_memory')
+            try:
+                images = unpack_images(shm.buf, shapes)
+            finally:
+                shm.close()
+            cnocr: AlOcr = self.__getattribute__(lang)
+            return batcher.submit(cnocr, images, cand_alphabet)
+
         def ocr(self, lang, img_fp):
             img_fp = pickle.loads(img_fp)
             cnocr: AlOcr = self.__getattribute__(lang)
@@ -238,13 +635,23 @@ def start_ocr_server(port=22268):
         logger.error(f"Ocr server cannot bind on port {port}")
         return
     logger.info(f"Ocr server listen on port {port}")
+
+    def health_report():
+        requests = 0
+        while 1:
+            gevent.sleep(60)
+            if batcher.stats.requests != requests:
+                requests = batcher.stats.requests
+                logger.info(f'Ocr server health: {batcher.report()}')
+
+    gevent.spawn(health_report)
     server.run()
 
 
-def start_ocr_server_process(port=22268):
+def start_ocr_server_process(port=22268, sessions=2):
     global process
     if not alive():
-        process = multiprocessing.Process(target=start_ocr_server, args=(port,))
+        process = multiprocessing.Process(target=start_ocr_server, args=(port, sessions))
         process.start()
 
 
@@ -271,6 +678,12 @@ if __name__ == "__main__":
         type=int,
         help="Port to listen. Default to OcrServerPort in deploy setting",
     )
+    parser.add_argument(
+        "--sessions",
+        type=int,
+        help="Inference sessions of each model. Default to OcrServerSessions in deploy setting",
+    )
     args, _ = parser.parse_known_args()
     port = args.port or State.deploy_config.OcrServerPort
-    start_ocr_server(port=port)
+    sessions = args.sessions or State.deploy_config.OcrServerSessions
+    start_ocr_server(port=port, sessions=sessions)
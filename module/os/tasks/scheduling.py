@@ -1011,11 +1011,11 @@ class OpsiScheduling(CoinTaskMixin, OSMap):
             ap_source = 'realtime'
         except Exception:
             try:
-                from module.statistics.opsi_month import get_ap_timeline
+                from module.statistics.opsi_month import get_latest_ap
                 instance_name = getattr(self.config, 'config_name', 'default')
-                ap_timeline = get_ap_timeline(instance_name=instance_name)
-                if ap_timeline:
-                    current_ap = int(ap_timeline[-1].get('ap', 0) or 0)
+                latest_ap = get_latest_ap(instance_name=instance_name)
+                if latest_ap:
+                    current_ap = int(latest_ap.get('ap', 0) or 0)
                     ap_source = 'snapshot'
             except Exception:
                 current_ap = 0
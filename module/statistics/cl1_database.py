@@ -2,6 +2,10 @@
 import sqlite3
 import json
 import os
+import asyncio
+import atexit
+import copy
+import threading
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, Any, List, Optional, Tuple
@@ -16,7 +20,25 @@ class Cl1Database:
     """
     CL1 数据加密 SQLite 数据库管理类。
     所有实例共享一个数据库文件，但数据经过 AES-GCM 加密，并由 device_id 保护。
+
+    写入采用 write-behind：增量写入只修改内存中解密后的 (instance, month) 文档，
+    由 AsyncExecutor 线程在 FLUSH_INTERVAL 秒后合并加密写入，每个任务结束和进程退出时也会写入。
+    WebUI 停止时会直接结束进程，最多丢失 FLUSH_INTERVAL 秒内的增量。
+    所有数据库操作复用同一个 WAL 模式的连接。
+
+    会无限增长的时间序列（明石行动力购买、行动力快照）不放在月度文档中，
+    而是逐行加密追加到 cl1_events 表，月度文档只保存累计值和最新值作为汇总。
     """
+    # 增量写入合并后落盘的间隔（秒），进程被结束时会丢失这段时间内的增量，不宜过长
+    FLUSH_INTERVAL = 2
+    # 数据库结构版本，保存在 PRAGMA user_version
+    SCHEMA_VERSION = 1
+    # 月度文档中旧的数组字段 -> 事件类型
+    EVENT_FIELDS = {
+        'akashi_ap_entries': 'akashi_ap',
+        'ap_snapshots': 'ap_snapshot',
+    }
+
     def __init__(self, db_path: Optional[Path] = None):
         if db_path is None:
             project_root = Path(__file__).resolve().parents[2]
@@ -26,9 +48,17 @@ class Cl1Database:
             self.db_path = db_path
             self.db_dir = self.db_path.parent
 
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+        # 待写入的解密文档。Key: (instance, month)
+        self._docs: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        # 待写入的事件 (instance, month, kind, event)
+        self._events: List[Tuple[str, str, str, Dict[str, Any]]] = []
+        self._flush_scheduled = False
         self._ensure_dir()
         self._init_db()
         self._encryption_key = self._derive_key()
+        self._migrate_schema()
         self._auto_migrate()
 
     def _ensure_dir(self):
@@ -37,10 +67,21 @@ class Cl1Database:
         except Exception as e:
             logger.error(f"Failed to create database directory: {e}")
 
+    def _connection(self) -> sqlite3.Connection:
+        """获取共享的数据库连接，调用方需持有 self._lock"""
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.db_path, timeout=10, check_same_thread=False)
+            try:
+                self._conn.execute('PRAGMA journal_mode=WAL')
+                self._conn.execute('PRAGMA synchronous=NORMAL')
+            except sqlite3.Error as e:
+                logger.warning(f"Failed to enable WAL mode for CL1 database: {e}")
+        return self._conn
+
     def _init_db(self):
         """初始化数据库表"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._lock, self._connection() as conn:
                 cursor = conn.cursor()
                 # 存储各实例、月份的加密数据
                 # encrypted_blob 包含 nonce + tag + ciphertext
@@ -52,10 +93,128 @@ class Cl1Database:
                         PRIMARY KEY (instance, month)
                     )
                 ''')
+                # 只追加的事件表，每行单独加密
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS cl1_events (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        instance TEXT,
+                        month TEXT,
+                        kind TEXT,
+                        ts TEXT,
+                        encrypted_blob BLOB
+                    )
+                ''')
+                cursor.execute('''
+                    CREATE INDEX IF NOT EXISTS idx_cl1_events
+                    ON cl1_events (instance, month, kind, ts)
+                ''')
                 conn.commit()
         except Exception as e:
             logger.exception(f"Failed to initialize CL1 database: {e}")
 
+    def _migrate_schema(self):
+        """将旧月度文档中的数组字段迁移到事件表"""
+        try:
+            with self._lock:
+                conn = self._connection()
+                if conn.execute('PRAGMA user_version').fetchone()[0] >= self.SCHEMA_VERSION:
+                    return
+                # 多个进程可能同时启动，加写锁后再检查一次
+                conn.execute('BEGIN IMMEDIATE')
+                try:
+                    if conn.execute('PRAGMA user_version').fetchone()[0] >= self.SCHEMA_VERSION:
+                        conn.rollback()
+                        return
+                    rows = conn.execute('SELECT instance, month, encrypted_blob FROM cl1_data').fetchall()
+                    migrated = 0
+                    for instance, month, blob in rows:
+                        data = self._decrypt(blob)
+                        if not data or not any(field in data for field in self.EVENT_FIELDS):
+                            continue
+                        events = self._split_events(instance, month, data)
+                        self._insert_events(conn, events)
+                        conn.execute(
+                            "UPDATE cl1_data SET encrypted_blob = ? WHERE instance = ? AND month = ?",
+                            (self._encrypt(data), instance, month))
+                        migrated += 1
+                    conn.execute(f'PRAGMA user_version = {self.SCHEMA_VERSION}')
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+                if migrated:
+                    logger.info(f"Migrated {migrated} CL1 monthly records to event table")
+        except Exception as e:
+            logger.exception(f"Failed to migrate CL1 database schema: {e}")
+
+    def _split_events(self, instance: str, month: str, data: Dict[str, Any]) -> List[Tuple[str, str, str, Dict[str, Any]]]:
+        """从文档中取出数组字段转为事件，并更新文档中的汇总值
+
+        Returns:
+            list: [(instance, month, kind, event), ...]
+        """
+        events = []
+        for field, kind in self.EVENT_FIELDS.items():
+            entries = data.pop(field, None)
+            if not entries:
+                continue
+            for entry in entries:
+                if isinstance(entry, dict):
+                    events.append((instance, month, kind, entry))
+                    self._summarize_event(data, kind, entry)
+        return events
+
+    @staticmethod
+    def _summarize_event(data: Dict[str, Any], kind: str, event: Dict[str, Any]):
+        """将一个事件计入月度文档的汇总值"""
+        key = f'{kind}_count'
+        data[key] = data.get(key, 0) + 1
+        if kind == 'ap_snapshot':
+            last = data.get('ap_last')
+            if last is None or str(event.get('ts', '')) >= str(last.get('ts', '')):
+                data['ap_last'] = event
+
+    def _insert_events(self, conn: sqlite3.Connection, events: List[Tuple[str, str, str, Dict[str, Any]]]):
+        rows = []
+        for instance, month, kind, event in events:
+            blob = self._encrypt(event)
+            if blob:
+                rows.append((instance, month, kind, str(event.get('ts', '')), blob))
+        if rows:
+            conn.executemany(
+                "INSERT INTO cl1_events (instance, month, kind, ts, encrypted_blob) VALUES (?, ?, ?, ?, ?)",
+                rows)
+
+    def get_events(self, instance: str, month: str, kind: str) -> List[Dict[str, Any]]:
+        """获取指定月份的事件，按时间排序
+
+        Args:
+            instance: 实例名称
+            month: 月份，如 2026-02
+            kind: 事件类型，见 EVENT_FIELDS
+
+        Returns:
+            list[dict]:
+        """
+        events = []
+        with self._lock:
+            try:
+                with self._connection() as conn:
+                    cursor = conn.execute(
+                        "SELECT encrypted_blob FROM cl1_events WHERE instance = ? AND month = ? AND kind = ? "
+                        "ORDER BY ts, id",
+                        (instance, month, kind))
+                    for row in cursor.fetchall():
+                        event = self._decrypt(row[0])
+                        if event:
+                            events.append(event)
+            except Exception as e:
+                logger.error(f"Failed to query events for {instance} {month} {kind}: {e}")
+            pending = [copy.deepcopy(e) for i, m, k, e in self._events if (i, m, k) == (instance, month, kind)]
+        if pending:
+            events = sorted(events + pending, key=lambda e: str(e.get('ts', '')))
+        return events
+
     def _derive_key(self) -> bytes:
         """基于 device_id 派生 256 位 AES 密钥"""
         device_id = get_device_id()
@@ -93,8 +252,17 @@ class Cl1Database:
 
     def get_stats(self, instance: str, month: str) -> Dict[str, Any]:
         """获取指定实例和月份的统计数据"""
+        with self._lock:
+            data = self._docs.get((instance, month))
+            if data is not None:
+                # 返回副本，调用方修改后需通过 save_stats 保存
+                return copy.deepcopy(data)
+            return self._read_stats(instance, month)
+
+    def _read_stats(self, instance: str, month: str) -> Dict[str, Any]:
+        """从数据库读取并解密统计数据，调用方需持有 self._lock"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute("SELECT encrypted_blob FROM cl1_data WHERE instance = ? AND month = ?", 
                              (instance, month))
@@ -108,12 +276,76 @@ class Cl1Database:
         
         return self._empty_data(month)
 
+    def _modify(self, instance: str, func, kind: str = None, event: Dict[str, Any] = None):
+        """在内存中修改本月文档，并安排延迟写入
+
+        Args:
+            instance: 实例名称
+            func: 接收文档 dict 并原地修改的函数，可以为 None
+            kind: 同时追加的事件类型
+            event: 同时追加的事件，会计入文档的汇总值
+        """
+        month = datetime.now().strftime('%Y-%m')
+        key = (instance, month)
+        with self._lock:
+            data = self._docs.get(key)
+            if data is None:
+                data = self._read_stats(instance, month)
+                self._docs[key] = data
+            if func is not None:
+                func(data)
+            if event is not None:
+                self._events.append((instance, month, kind, event))
+                self._summarize_event(data, kind, event)
+            if self._flush_scheduled:
+                return
+            self._flush_scheduled = True
+        try:
+            from module.base.async_executor import async_executor
+            async_executor.submit(self._flush_later)
+        except Exception as e:
+            logger.warning(f"Failed to schedule CL1 database flush: {e}")
+            self.flush()
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.FLUSH_INTERVAL)
+        self.flush()
+
+    def flush(self):
+        """将内存中的文档加密后写入数据库"""
+        with self._lock:
+            self._flush_scheduled = False
+            if not self._docs and not self._events:
+                return
+            rows = []
+            for (instance, month), data in self._docs.items():
+                blob = self._encrypt(data)
+                if blob:
+                    rows.append((instance, month, blob))
+            try:
+                with self._connection() as conn:
+                    self._insert_events(conn, self._events)
+                    conn.executemany('''
+                        INSERT INTO cl1_data (instance, month, encrypted_blob) 
+                        VALUES (?, ?, ?)
+                        ON CONFLICT(instance, month) DO UPDATE SET encrypted_blob = excluded.encrypted_blob
+                    ''', rows)
+            except Exception as e:
+                logger.error(f"Failed to flush CL1 stats: {e}")
+                return
+            # 写入后不再缓存，其他进程（如 WebUI）的修改可以在下次读取时生效
+            self._docs.clear()
+            self._events.clear()
+
     def _empty_data(self, month: str) -> Dict[str, Any]:
         return {
             'battle_count': 0,
             'akashi_encounters': 0,
             'akashi_ap': 0,
-            'akashi_ap_entries': [],
+            # 明石行动力购买条目和行动力快照保存在 cl1_events 表，这里只有汇总
+            'akashi_ap_count': 0,
+            'ap_snapshot_count': 0,
+            'ap_last': None,
             # 短猫数据
             'meow_battle_raw_count': 0,
             'meow_battle_count': 0,
@@ -214,8 +446,9 @@ class Cl1Database:
 
     def _list_stats_rows(self, instance: Optional[str] = None) -> List[Tuple[str, str]]:
         """列出数据库中已有的实例与月份。"""
+        self.flush()
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._lock, self._connection() as conn:
                 cursor = conn.cursor()
                 if instance:
                     cursor.execute(
@@ -280,10 +513,15 @@ class Cl1Database:
     def save_stats(self, instance: str, month: str, data: Dict[str, Any]):
         """保存统计数据"""
         try:
+            # 旧格式的数组字段转为事件
+            events = self._split_events(instance, month, data)
             blob = self._encrypt(data)
             if not blob:
                 return
-            with sqlite3.connect(self.db_path) as conn:
+            with self._lock, self._connection() as conn:
+                # 整份文档已给出，丢弃内存中尚未写入的版本
+                self._docs.pop((instance, month), None)
+                self._insert_events(conn, events)
                 cursor = conn.cursor()
                 cursor.execute('''
                     INSERT INTO cl1_data (instance, month, encrypted_blob) 
@@ -296,23 +534,20 @@ class Cl1Database:
 
     def increment_battle_count(self, instance: str, delta: int = 1):
         """增加战斗次数"""
-        month = datetime.now().strftime('%Y-%m')
-        data = self.get_stats(instance, month)
-        data['battle_count'] = data.get('battle_count', 0) + delta
-        self.save_stats(instance, month, data)
+        def modify(data):
+            data['battle_count'] = data.get('battle_count', 0) + delta
+
+        self._modify(instance, modify)
 
     def increment_akashi_encounter(self, instance: str):
         """增加明石奇遇次数"""
-        month = datetime.now().strftime('%Y-%m')
-        data = self.get_stats(instance, month)
-        data['akashi_encounters'] = data.get('akashi_encounters', 0) + 1
-        self.save_stats(instance, month, data)
+        def modify(data):
+            data['akashi_encounters'] = data.get('akashi_encounters', 0) + 1
+
+        self._modify(instance, modify)
 
     def add_akashi_ap_entry(self, instance: str, amount: int, base: int, count: int, source: str):
         """记录明石行动力购买条目"""
-        month = datetime.now().strftime('%Y-%m')
-        data = self.get_stats(instance, month)
-        
         entry = {
             'ts': datetime.now().isoformat(),
             'amount': amount,
@@ -320,13 +555,11 @@ class Cl1Database:
             'count': count,
             'source': source
         }
-        
-        entries = data.get('akashi_ap_entries', [])
-        entries.append(entry)
-        data['akashi_ap_entries'] = entries
-        
-        data['akashi_ap'] = data.get('akashi_ap', 0) + amount
-        self.save_stats(instance, month, data)
+
+        def modify(data):
+            data['akashi_ap'] = data.get('akashi_ap', 0) + amount
+
+        self._modify(instance, modify, kind='akashi_ap', event=entry)
 
     def add_ap_snapshot(self, instance: str, ap_current: int, source: str = 'cl1'):
         """记录行动力快照（真实剩余体力）
@@ -336,19 +569,13 @@ class Cl1Database:
             ap_current: 当前行动力剩余
             source: 数据来源标记 (cl1 / meow 等)
         """
-        month = datetime.now().strftime('%Y-%m')
-        data = self.get_stats(instance, month)
-
         snapshot = {
             'ts': datetime.now().isoformat(),
             'ap': int(ap_current),
             'source': source,
         }
 
-        snapshots = data.get('ap_snapshots', [])
-        snapshots.append(snapshot)
-        data['ap_snapshots'] = snapshots
-        self.save_stats(instance, month, data)
+        self._modify(instance, None, kind='ap_snapshot', event=snapshot)
 
     def migrate_from_json(self, json_path: Path, instance: str):
         """从 JSON 文件迁移数据到数据库"""
@@ -372,7 +599,7 @@ class Cl1Database:
             
             for month in months:
                 # 首先检查数据库是否已有数据，避免覆盖
-                with sqlite3.connect(self.db_path) as conn:
+                with self._lock, self._connection() as conn:
                     c = conn.cursor()
                     c.execute("SELECT 1 FROM cl1_data WHERE instance = ? AND month = ?", (instance, month))
                     if c.fetchone():
@@ -450,11 +677,11 @@ class Cl1Database:
         else:
             delta = 1  # 默认直接加1
 
-        month = datetime.now().strftime('%Y-%m')
-        data = self.get_stats(instance, month)
-        data['meow_battle_raw_count'] = data.get('meow_battle_raw_count', 0) + 1
-        data['meow_battle_count'] = data.get('meow_battle_count', 0) + delta
-        self.save_stats(instance, month, data)
+        def modify(data):
+            data['meow_battle_raw_count'] = data.get('meow_battle_raw_count', 0) + 1
+            data['meow_battle_count'] = data.get('meow_battle_count', 0) + delta
+
+        self._modify(instance, modify)
 
     def add_meow_round_time(self, instance: str, duration: float, hazard_level: int = None):
         """记录短猫单轮战斗时间
@@ -469,24 +696,23 @@ class Cl1Database:
             logger.debug(f'Invalid hazard_level {hazard_level}, ignoring')
             hazard_level = None
 
-        month = datetime.now().strftime('%Y-%m')
-        data = self.get_stats(instance, month)
-
-        normalized_times = self._normalize_meow_round_times(data.get('meow_round_times', []))
-
         # 保存为字典，包含时长和侵蚀等级
         new_entry = {
             'duration': round(duration, 2),
             'hazard_level': hazard_level
         }
-        normalized_times.append(new_entry)
 
-        # 只保留最近100个样本
-        if len(normalized_times) > 100:
-            normalized_times = normalized_times[-100:]
+        def modify(data):
+            normalized_times = self._normalize_meow_round_times(data.get('meow_round_times', []))
+            normalized_times.append(new_entry)
 
-        data['meow_round_times'] = normalized_times
-        self.save_stats(instance, month, data)
+            # 只保留最近100个样本
+            if len(normalized_times) > 100:
+                normalized_times = normalized_times[-100:]
+
+            data['meow_round_times'] = normalized_times
+
+        self._modify(instance, modify)
 
     def add_meow_battle_time(self, instance: str, duration: float):
         """记录短猫单场战斗时间
@@ -495,21 +721,20 @@ class Cl1Database:
             instance: 实例名称
             duration: 战斗耗时（秒）
         """
-        month = datetime.now().strftime('%Y-%m')
-        data = self.get_stats(instance, month)
+        def modify(data):
+            if 'meow_battle_times' not in data:
+                data['meow_battle_times'] = []
 
-        if 'meow_battle_times' not in data:
-            data['meow_battle_times'] = []
+            times = data['meow_battle_times']
+            times.append(round(duration, 2))
 
-        times = data['meow_battle_times']
-        times.append(round(duration, 2))
+            # 只保留最近100个样本
+            if len(times) > 100:
+                times = times[-100:]
 
-        # 只保留最近100个样本
-        if len(times) > 100:
-            times = times[-100:]
+            data['meow_battle_times'] = times
 
-        data['meow_battle_times'] = times
-        self.save_stats(instance, month, data)
+        self._modify(instance, modify)
 
     def get_meow_stats(self, instance: str, year: int = None, month: int = None) -> Dict[str, Any]:
         """获取短猫统计数据
@@ -608,4 +833,5 @@ class Cl1Database:
 
 # 单例实例
 db = Cl1Database()
+atexit.register(db.flush)
 
@@ -5,6 +5,7 @@ from module.base.button import ButtonGrid
 from module.base.utils import *
 from module.logger import logger
 from module.ocr.ocr import Digit, DigitYuv
+from module.statistics.item_index import ItemTemplateIndex
 from module.statistics.utils import *
 
 
@@ -153,10 +154,14 @@ class ItemGrid:
         self.colors = {}
         self.templates = {}
         self.templates_hit = {}
+        self.templates_index = ItemTemplateIndex()
         self.next_template_index = len(self.templates.keys())
         for name, template in templates.items():
-            self.templates[name] = crop(template.image, area=self.template_area)
+            image = crop(template.image, area=self.template_area)
+            self.colors[name] = cv2.mean(image)[:3]
+            self.templates[name] = image
             self.templates_hit[name] = 0
+            self.templates_index.add(name, image, color=self.colors[name])
             if name.isdigit() and int(name) > self.next_template_index:
                 self.next_template_index = int(name)
 
@@ -193,6 +198,7 @@ class ItemGrid:
             self.colors[name] = cv2.mean(image)[:3]
             self.templates[name] = image
             self.templates_hit[name] = 0
+            self.templates_index.add(name, image, color=self.colors[name])
             if name.isdigit():
                 max_digit = max(max_digit, int(name))
             self.next_template_index += 1
@@ -219,7 +225,8 @@ class ItemGrid:
 
     def match_template(self, image, similarity=None):
         """
-        Match templates, try most frequent hit templates first.
+        Match templates, try known templates in similar color first, closest ones first.
+        See ItemTemplateIndex.
 
         Args:
             image (np.ndarray):
@@ -230,26 +237,22 @@ class ItemGrid:
         """
         if similarity is None:
             similarity = self.similarity
-        color = cv2.mean(crop(image, self.template_area))[:3]
-        # Match frequently hit templates first
-        names = np.array(list(self.templates.keys()))[np.argsort(list(self.templates_hit.values()))][::-1]
-        # Match known templates first
-        names = [name for name in names if not name.isdigit()] + [name for name in names if name.isdigit()]
-        for name in names:
-            if color_similar(color1=color, color2=self.colors[name], threshold=30):
-                res = cv2.matchTemplate(image, self.templates[name], cv2.TM_CCOEFF_NORMED)
-                _, sim, _, _ = cv2.minMaxLoc(res)
-                if sim > similarity:
-                    self.templates_hit[name] += 1
-                    return name
+        area = crop(image, self.template_area)
+        color = cv2.mean(area)[:3]
+        for name in self.templates_index.rank(area, color=color, threshold=30):
+            res = cv2.matchTemplate(image, self.templates[name], cv2.TM_CCOEFF_NORMED)
+            _, sim, _, _ = cv2.minMaxLoc(res)
+            if sim > similarity:
+                self.templates_hit[name] += 1
+                return name
 
         self.next_template_index += 1
         name = str(self.next_template_index)
         logger.info(f'New template: {name}')
-        image = crop(image, self.template_area)
-        self.colors[name] = cv2.mean(image)[:3]
-        self.templates[name] = image
+        self.colors[name] = color
+        self.templates[name] = area
         self.templates_hit[name] = self.templates_hit.get(name, 0) + 1
+        self.templates_index.add(name, area, color=color)
         return name
 
     def extract_template(self, image, folder=None):
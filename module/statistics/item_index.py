@@ -0,0 +1,96 @@
+import cv2
+import numpy as np
+
+from module.base.utils import rgb2gray
+
+
+class ItemTemplateIndex:
+    """
+    Compact features of item templates, to rank templates before running `cv2.matchTemplate`.
+
+    Each template has a mean color and a small normalized gray thumbnail, stored in numpy matrices.
+    Candidates are filtered by color with the same tolerance as `color_similar()`,
+    then sorted by thumbnail distance in one vectorized computation,
+    so the template most likely to match is confirmed first.
+
+    Examples:
+        index = ItemTemplateIndex()
+        index.add('Coin', template)
+        for name in index.rank(crop(image, template_area)):
+            ...
+    """
+    THUMB_SIZE = (8, 8)
+
+    def __init__(self):
+        self.names = []
+        self._colors = []
+        self._thumbs = []
+        self._known = []
+        self._matrix = None
+
+    @classmethod
+    def thumbnail(cls, image):
+        """
+        Args:
+            image (np.ndarray): RGB image.
+
+        Returns:
+            np.ndarray: Shape (THUMB_SIZE[0] * THUMB_SIZE[1],), zero mean and unit norm.
+        """
+        thumb = cv2.resize(rgb2gray(image), cls.THUMB_SIZE, interpolation=cv2.INTER_AREA)
+        thumb = thumb.astype(np.float32).ravel()
+        thumb -= thumb.mean()
+        norm = np.linalg.norm(thumb)
+        if norm > 0:
+            thumb /= norm
+        return thumb
+
+    def add(self, name, image, color=None):
+        """
+        Args:
+            name (str): Template name.
+            image (np.ndarray): Template image.
+            color (tuple): Mean color of template, calculated if not provided.
+        """
+        if color is None:
+            color = cv2.mean(image)[:3]
+        self.names.append(name)
+        self._colors.append(color)
+        self._thumbs.append(self.thumbnail(image))
+        # Known templates are tried before the auto generated ones named in digits
+        self._known.append(not name.isdigit())
+        self._matrix = None
+
+    def _build(self):
+        if self._matrix is None:
+            self._matrix = (
+                np.array(self._colors, dtype=np.float32).reshape((-1, 3)),
+                np.array(self._thumbs, dtype=np.float32).reshape((len(self.names), -1)),
+                np.array(self._known, dtype=bool),
+            )
+        return self._matrix
+
+    def rank(self, image, color=None, threshold=30):
+        """
+        Args:
+            image (np.ndarray): Image cropped in the same area as templates.
+            color (tuple): Mean color of image, calculated if not provided.
+            threshold (int): Color tolerance, same as `color_similar()`.
+
+        Returns:
+            list[str]: Names of templates in similar color, known templates first, then the closest first.
+        """
+        if not self.names:
+            return []
+        if color is None:
+            color = cv2.mean(image)[:3]
+        colors, thumbs, known = self._build()
+        diff = colors - np.array(color, dtype=np.float32)
+        tolerance = np.maximum(diff.max(axis=1), 0) - np.minimum(diff.min(axis=1), 0)
+        candidate = np.flatnonzero(tolerance <= threshold)
+        if not candidate.size:
+            return []
+
+        distance = 1 - thumbs[candidate] @ self.thumbnail(image)
+        order = np.lexsort((distance, ~known[candidate]))
+        return [self.names[index] for index in candidate[order]]
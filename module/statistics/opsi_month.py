@@ -121,19 +121,24 @@ def get_ap_timeline(year: int | None = None, month: int | None = None, instance_
     key_prefix = f"{year:04d}-{month:02d}"
 
     instance_name = instance_name or "default"
-    data = cl1_db.get_stats(instance_name, key_prefix)
+    # 事件表按 (instance, month, kind, ts) 建有索引，直接按时间顺序读出
+    return cl1_db.get_events(instance_name, key_prefix, 'ap_snapshot')
+
 
-    snapshots = data.get('ap_snapshots', [])
-    if not snapshots:
-        return []
+def get_latest_ap(instance_name: str | None = None) -> Optional[Dict[str, Any]]:
+    """
+    获取本月最新的行动力快照，从月度汇总中读取，不需要读取整个时间序列。
 
-    # 按时间排序
-    try:
-        snapshots_sorted = sorted(snapshots, key=lambda e: e.get('ts', ''))
-    except Exception:
-        snapshots_sorted = snapshots
+    Args:
+        instance_name: 实例名称
 
-    return snapshots_sorted
+    Returns:
+        dict: 与 get_ap_timeline() 的数据点相同，没有快照时返回 None
+    """
+    key_prefix = datetime.now().strftime('%Y-%m')
+    instance_name = instance_name or "default"
+    data = cl1_db.get_stats(instance_name, key_prefix)
+    return data.get('ap_last')
 
 
-__all__ = ["get_opsi_stats", "OpsiMonthStats", "compute_monthly_cl1_akashi_ap", "get_ap_timeline"]
+__all__ = ["get_opsi_stats", "OpsiMonthStats", "compute_monthly_cl1_akashi_ap", "get_ap_timeline", "get_latest_ap"]
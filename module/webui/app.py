@@ -822,7 +822,7 @@ class AlasGUI(Frame):
                         from datetime import datetime, timedelta
                         from module.config.utils import get_os_next_reset
                         from module.statistics.cl1_database import db as cl1_db
-                        from module.statistics.opsi_month import get_ap_timeline
+                        from module.statistics.opsi_month import get_latest_ap
 
                         config_for_stat = self.alas_config if hasattr(self, 'alas_config') else None
                         mode = 'balanced'
@@ -851,8 +851,8 @@ class AlasGUI(Frame):
                         meow_data_fallback = cl1_db.get_meow_stats(instance_name_stat)
                         avg_meow_round_time = float(meow_data_fallback.get('avg_round_time', 0) or 0)
 
-                        ap_timeline = get_ap_timeline(instance_name=instance_name_stat)
-                        current_ap = int(ap_timeline[-1].get('ap', 0)) if ap_timeline else 0
+                        latest_ap = get_latest_ap(instance_name=instance_name_stat)
+                        current_ap = int(latest_ap.get('ap', 0)) if latest_ap else 0
 
                         meow_round_ap = 30
                         available_rounds = (current_ap / meow_round_ap) if meow_round_ap else 0
@@ -2796,7 +2796,9 @@ def startup():
     if State.deploy_config.DiscordRichPresence:
         init_discord_rpc()
     if State.deploy_config.StartOcrServer:
-        start_ocr_server_process(State.deploy_config.OcrServerPort)
+        start_ocr_server_process(State.deploy_config.OcrServerPort, State.deploy_config.OcrServerSessions)
+    if State.deploy_config.SharedAssetAtlas:
+        ProcessManager.start_atlas_process()
     if (
             State.deploy_config.EnableRemoteAccess
             and State.deploy_config.Password is not None
@@ -2,9 +2,9 @@ import argparse
 # 此文件专门用于管理 Alas 运行时各实例进程的生存周期及其子进程。
 # 负责多账号多开时的进程池维护、状态（运行中、停止、异常）追踪及进程间通信的安全处理逻辑。
 import os
-import queue
 import threading
-from multiprocessing import Process
+from multiprocessing import Pipe, Process
+from multiprocessing.connection import Connection
 from typing import Dict, List, Union
 
 import inflection
@@ -29,7 +29,8 @@ class ProcessManager:
 
     def __init__(self, config_name: str = "alas") -> None:
         self.config_name = config_name
-        self._renderable_queue: queue.Queue[ConsoleRenderable] = State.manager.Queue()
+        # Read end of the log pipe from the running process, see `run_process()`
+        self._log_reader: Connection = None
         self.renderables: List[ConsoleRenderable] = []
         self.renderables_max_length = 400
         self.renderables_reduce_length = 80
@@ -41,10 +42,12 @@ class ProcessManager:
         if not self.alive:
             if func is None:
                 func = get_config_mod(self.config_name)
+            # One pipe per process, log records are sent directly without a manager process in between
+            reader, writer = Pipe(duplex=False)
             args = (
                 self.config_name,
                 func,
-                self._renderable_queue,
+                writer,
                 ev,
             )
             self._process = Process(
@@ -52,16 +55,15 @@ class ProcessManager:
                 args=args,
             )
             self._process.start()
+            # Close our copy of the write end, so reader gets EOF when process exits
+            writer.close()
+            self._log_reader = reader
             self.start_log_queue_handler()
 
     def start_log_queue_handler(self):
-        if (
-            self.thd_log_queue_handler is not None
-            and self.thd_log_queue_handler.is_alive()
-        ):
-            return
+        # Handler of the previous process, if still alive, ends itself on EOF of its own pipe
         self.thd_log_queue_handler = threading.Thread(
-            target=self._thread_log_queue_handler
+            target=self._thread_log_queue_handler, args=(self._log_reader,)
         )
         self.thd_log_queue_handler.start()
 
@@ -86,15 +88,23 @@ class ProcessManager:
                     )
         logger.info(f"[{self.config_name}] exited")
 
-    def _thread_log_queue_handler(self) -> None:
-        while self.alive:
-            try:
-                log = self._renderable_queue.get(timeout=1)
-            except queue.Empty:
-                continue
-            self.renderables.append(log)
-            if len(self.renderables) > self.renderables_max_length:
-                self.renderables = self.renderables[self.renderables_reduce_length :]
+    def _thread_log_queue_handler(self, reader: Connection) -> None:
+        try:
+            while True:
+                if not reader.poll(1):
+                    if self.alive:
+                        continue
+                    break
+                # WebLogRecord or renderable, rendered lazily when GUI shows it, see module.logger.WebLogRecord
+                log = reader.recv()
+                self.renderables.append(log)
+                if len(self.renderables) > self.renderables_max_length:
+                    del self.renderables[:self.renderables_reduce_length]
+        except (EOFError, OSError):
+            # Process exited
+            pass
+        finally:
+            reader.close()
         logger.info("End of log queue handler loop")
 
     @property
@@ -135,7 +145,7 @@ class ProcessManager:
 
     @staticmethod
     def run_process(
-        config_name, func: str, q: queue.Queue, e: threading.Event = None
+        config_name, func: str, writer: Connection, e: threading.Event = None
     ) -> None:
         parser = argparse.ArgumentParser()
         parser.add_argument(
@@ -151,7 +161,17 @@ class ProcessManager:
             logger.info("Electron detected, remove log output to stdout")
             from module.logger import console_hdlr
             logger.removeHandler(console_hdlr)
-        set_func_logger(func=q.put)
+        lock = threading.Lock()
+
+        def send(log):
+            # Connection is not thread safe, and logging should never raise if GUI is gone
+            with lock:
+                try:
+                    writer.send(log)
+                except (OSError, ValueError):
+                    pass
+
+        set_func_logger(func=send, structured=True)
 
         from module.config.config import AzurLaneConfig
 
@@ -188,6 +208,27 @@ class ProcessManager:
         except Exception as e:
             logger.exception(e)
 
+    @staticmethod
+    def run_atlas_process() -> None:
+        """
+        Pack asset atlas in a subprocess, so GUI won't import all assets.
+        Alas instances memory-map the atlas and share its pages, see module.base.atlas
+        """
+        remove_fake_pil_module()
+        try:
+            from module.base.atlas import build_atlas
+
+            build_atlas(only_outdated=True)
+        except Exception as e:
+            logger.exception(e)
+
+    @classmethod
+    def start_atlas_process(cls) -> Process:
+        logger.info("Start asset atlas process")
+        process = Process(target=ProcessManager.run_atlas_process, daemon=True)
+        process.start()
+        return process
+
     @classmethod
     def running_instances(cls) -> List["ProcessManager"]:
         l = []